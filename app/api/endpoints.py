@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Cookie, Depends, Request, Form
+from fastapi import APIRouter, Cookie, Depends, Request, Form, Query
 from fastapi.responses import RedirectResponse
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db.db import get_async_db
+from app.core.config import settings
+from app.core.limits import auth_limiter, post_limiter, rate_limit
+from app.core.sessions import session_store
+from app.db.db import get_async_db, get_read_db, get_reader
+from app.repositories.memory import InMemoryBlogRepository, memory_store
 from app.repositories.repository import BlogRepository, SQLAlchemyBlogRepository
 
 router = APIRouter(
@@ -15,10 +19,23 @@ def get_session_id(session_id: str = Cookie(default=None)):
     return session_id
 
 
-async def get_repository(
+async def get_database_repository(
     database: AsyncSession = Depends(get_async_db),
+    read_database: AsyncSession = Depends(get_read_db),
+    reader: async_sessionmaker = Depends(get_reader),
 ) -> BlogRepository:
-    return SQLAlchemyBlogRepository(database)
+    return SQLAlchemyBlogRepository(database, read_database, reader)
+
+
+async def get_memory_repository() -> BlogRepository:
+    return InMemoryBlogRepository(memory_store)
+
+
+REPOSITORY_DEPENDENCIES = {
+    "sqlalchemy": get_database_repository,
+    "memory": get_memory_repository,
+}
+get_repository = REPOSITORY_DEPENDENCIES[settings.REPOSITORY_BACKEND]
 
 
 @router.get("/signup/", response_class=RedirectResponse)
@@ -28,7 +45,7 @@ def render_signup_page(
     return repo.render_signup_page(request)
 
 
-@router.post("/signup/")
+@router.post("/signup/", dependencies=[Depends(rate_limit(auth_limiter))])
 async def register_user(
     username: str = Form(...),
     password: str = Form(...),
@@ -42,7 +59,7 @@ def render_login_page(request: Request, repo: BlogRepository = Depends(get_repos
     return repo.render_login_page(request)
 
 
-@router.post("/login/")
+@router.post("/login/", dependencies=[Depends(rate_limit(auth_limiter))])
 async def login_user(
     username: str = Form(...),
     password: str = Form(...),
@@ -52,7 +69,8 @@ async def login_user(
 
 
 @router.get("/logout/")
-def logout():
+async def logout(session_id: str = Depends(get_session_id)):
+    await session_store.delete(session_id)
     response = RedirectResponse(url="/api/blog", status_code=303)
     response.delete_cookie("session_id")
 
@@ -62,22 +80,28 @@ def logout():
 @router.get("/blog/", response_class=RedirectResponse)
 async def get_all_blogs(
     request: Request,
+    before: str | None = None,
+    after: str | None = None,
     repo: BlogRepository = Depends(get_repository),
     session_id: str = Depends(get_session_id),
 ):
-    return await repo.get_all_blogs(request, session_id)
+    return await repo.get_all_blogs(request, session_id, before, after)
 
 
 @router.get("/blog/create/", response_class=RedirectResponse)
-def render_create_post_page(
+async def render_create_post_page(
     request: Request,
     repo: BlogRepository = Depends(get_repository),
     session_id: str = Depends(get_session_id),
 ):
-    return repo.render_create_post_page(request, session_id)
+    return await repo.render_create_post_page(request, session_id)
 
 
-@router.post("/blog/create/", response_class=RedirectResponse)
+@router.post(
+    "/blog/create/",
+    response_class=RedirectResponse,
+    dependencies=[Depends(rate_limit(post_limiter))],
+)
 async def create_post(
     title: str = Form(...),
     body: str = Form(...),
@@ -96,9 +120,11 @@ async def get_blog(
 
 @router.get("/users/", response_class=RedirectResponse)
 async def get_all_users(
-    request: Request, repo: BlogRepository = Depends(get_repository)
+    request: Request,
+    page: int = Query(default=1, ge=1),
+    repo: BlogRepository = Depends(get_repository),
 ):
-    return await repo.get_all_users(request)
+    return await repo.get_all_users(request, page)
 
 
 @router.get("/users/{user_id}/", response_class=RedirectResponse)
@@ -109,3 +135,42 @@ async def get_user(
     session_id: str = Depends(get_session_id),
 ):
     return await repo.get_user(request, user_id, session_id)
+
+
+@router.post("/users/{user_id}/follow/", response_class=RedirectResponse)
+async def follow_user(
+    user_id: int,
+    repo: BlogRepository = Depends(get_repository),
+    session_id: str = Depends(get_session_id),
+):
+    return await repo.follow_user(user_id, session_id)
+
+
+@router.post("/users/{user_id}/unfollow/", response_class=RedirectResponse)
+async def unfollow_user(
+    user_id: int,
+    repo: BlogRepository = Depends(get_repository),
+    session_id: str = Depends(get_session_id),
+):
+    return await repo.unfollow_user(user_id, session_id)
+
+
+@router.get("/timeline/", response_class=RedirectResponse)
+async def get_timeline(
+    request: Request,
+    before: str | None = None,
+    after: str | None = None,
+    repo: BlogRepository = Depends(get_repository),
+    session_id: str = Depends(get_session_id),
+):
+    return await repo.get_timeline(request, session_id, before, after)
+
+
+@router.get("/search/", response_class=RedirectResponse)
+async def search_posts(
+    request: Request,
+    q: str = Query(default="", max_length=200),
+    page: int = Query(default=1, ge=1),
+    repo: BlogRepository = Depends(get_repository),
+):
+    return await repo.search_posts(request, q, page)
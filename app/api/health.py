@@ -0,0 +1,32 @@
+import asyncio
+
+from fastapi import APIRouter, Request
+from fastapi.responses import ORJSONResponse
+
+from app.core.config import settings
+from app.db.db import ping
+
+router = APIRouter(tags=["Health"], default_response_class=ORJSONResponse)
+
+READY_TIMEOUT = 2.0
+
+
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        return ORJSONResponse({"status": "starting"}, status_code=503)
+
+    if settings.REPOSITORY_BACKEND == "memory":
+        return {"status": "ok"}
+
+    try:
+        await asyncio.wait_for(ping(), READY_TIMEOUT)
+    except Exception:
+        return ORJSONResponse({"status": "database unavailable"}, status_code=503)
+
+    return {"status": "ok"}
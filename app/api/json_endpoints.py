@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.api.endpoints import get_repository
+from app.api.schemas import (
+    PostDetail,
+    PostPage,
+    PostSummary,
+    UserPage,
+    UserPost,
+    UserPostPage,
+    UserSummary,
+)
+from app.repositories.repository import BlogRepository
+
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["API v1"],
+    default_response_class=ORJSONResponse,
+)
+
+MAX_PAGE_SIZE = 100
+
+
+def get_fields(fields: str | None = Query(default=None)) -> set[str] | None:
+    if not fields:
+        return None
+
+    return {field.strip() for field in fields.split(",") if field.strip()}
+
+
+def project(rows, model: type[BaseModel], fields: set[str] | None) -> list[dict]:
+    names = list(model.model_fields)
+    if fields is not None:
+        unknown = fields.difference(names)
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        names = [name for name in names if name in fields]
+
+    return [{name: row._mapping[name] for name in names} for row in rows]
+
+
+@router.get("/posts/", response_model=PostPage)
+async def list_posts(
+    before: str | None = None,
+    after: str | None = None,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    fields: set[str] | None = Depends(get_fields),
+    repo: BlogRepository = Depends(get_repository),
+):
+    page = await repo.fetch_feed(before, after, limit)
+
+    return ORJSONResponse(
+        {
+            "items": project(page.items, PostSummary, fields),
+            "older": page.older,
+            "newer": page.newer,
+        }
+    )
+
+
+@router.get("/posts/{post_id}/", response_model=PostDetail)
+async def get_post(
+    post_id: int,
+    fields: set[str] | None = Depends(get_fields),
+    repo: BlogRepository = Depends(get_repository),
+):
+    post = await repo.fetch_post(post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Blog not found")
+
+    return ORJSONResponse(project([post], PostDetail, fields)[0])
+
+
+@router.get("/users/", response_model=UserPage)
+async def list_users(
+    page: int = Query(default=1, ge=1),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    fields: set[str] | None = Depends(get_fields),
+    repo: BlogRepository = Depends(get_repository),
+):
+    users, has_next = await repo.fetch_users(page, limit)
+
+    return ORJSONResponse(
+        {
+            "items": project(users, UserSummary, fields),
+            "page": page,
+            "has_next": has_next,
+        }
+    )
+
+
+@router.get("/users/{user_id}/", response_model=UserSummary)
+async def get_user(
+    user_id: int,
+    fields: set[str] | None = Depends(get_fields),
+    repo: BlogRepository = Depends(get_repository),
+):
+    user = await repo.fetch_user(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return ORJSONResponse(project([user], UserSummary, fields)[0])
+
+
+@router.get("/users/{user_id}/posts/", response_model=UserPostPage)
+async def list_user_posts(
+    user_id: int,
+    before: str | None = None,
+    after: str | None = None,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    fields: set[str] | None = Depends(get_fields),
+    repo: BlogRepository = Depends(get_repository),
+):
+    page = await repo.fetch_user_posts(user_id, before, after, limit)
+    if not page.items and not await repo.fetch_user(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return ORJSONResponse(
+        {
+            "items": project(page.items, UserPost, fields),
+            "older": page.older,
+            "newer": page.newer,
+        }
+    )
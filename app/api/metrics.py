@@ -0,0 +1,69 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.cache import page_cache
+from app.core.metrics import registry
+from app.core.security import password_hasher
+from app.db.db import pool_status
+from app.repositories.outbox import outbox_worker
+
+router = APIRouter(tags=["Metrics"])
+
+
+@registry.collector
+def page_cache_metrics():
+    stats = page_cache.stats()
+    yield "page_cache_entries", "gauge", "Rendered pages in the cache.", [
+        ({}, stats["entries"])
+    ]
+    for name in ("hits", "misses", "evictions", "invalidations"):
+        yield f"page_cache_{name}_total", "counter", f"Page cache {name}.", [
+            ({}, stats[name])
+        ]
+
+
+@registry.collector
+def pool_metrics():
+    status = pool_status()
+    yield "db_pool_size", "gauge", "Configured DB_POOL_SIZE.", [
+        ({}, status["size"])
+    ]
+    yield "db_pool_checked_out", "gauge", "Connections in use.", [
+        ({}, status["checked_out"])
+    ]
+    yield "db_pool_overflow", "gauge", "Connections open beyond DB_POOL_SIZE.", [
+        ({}, status["overflow"])
+    ]
+    yield "db_pool_waiting", "gauge", "Checkouts waiting for a connection.", [
+        ({}, status["waiting"])
+    ]
+
+
+@registry.collector
+def password_hasher_metrics():
+    yield (
+        "password_hash_rejected_total",
+        "counter",
+        "Hashing requests rejected after PASSWORD_HASH_QUEUE_TIMEOUT.",
+        [({}, password_hasher.rejected)],
+    )
+
+
+@registry.collector
+def outbox_metrics():
+    yield "outbox_depth", "gauge", "Outbox jobs waiting to run.", [
+        ({}, outbox_worker.depth)
+    ]
+    yield "outbox_lag_seconds", "gauge", "Age of the oldest waiting outbox job.", [
+        ({}, outbox_worker.lag)
+    ]
+    yield "outbox_dead", "gauge", "Outbox jobs out of OUTBOX_MAX_ATTEMPTS.", [
+        ({}, outbox_worker.dead)
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class PostSummary(BaseModel):
+    id: int
+    author_id: int
+    username: str
+    title: str
+    excerpt: str
+    excerpt_has_more: bool
+    created_at: datetime
+
+
+class PostDetail(BaseModel):
+    id: int
+    author_id: int
+    username: str
+    title: str
+    body: str
+    body_html: str | None
+    created_at: datetime
+    updated_at: datetime
+
+
+class UserPost(BaseModel):
+    id: int
+    title: str
+    excerpt: str
+    excerpt_has_more: bool
+    created_at: datetime
+
+
+class UserSummary(BaseModel):
+    id: int
+    username: str
+    role: str
+    created_at: datetime
+    recent_post_at: datetime | None
+    post_count: int
+    follower_count: int
+
+
+class PostPage(BaseModel):
+    items: list[PostSummary]
+    older: str | None
+    newer: str | None
+
+
+class UserPostPage(BaseModel):
+    items: list[UserPost]
+    older: str | None
+    newer: str | None
+
+
+class UserPage(BaseModel):
+    items: list[UserSummary]
+    page: int
+    has_next: bool
@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict, defaultdict
+
+from app.core.config import settings
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, refresh: bool = False):
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or entry[1] <= now:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        if refresh:
+            self._entries[key] = (entry[0], now + self.ttl)
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return entry[0]
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class PageCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.pages = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.generations = defaultdict(int)
+        self.invalidations = 0
+
+    def get(self, route: str, key):
+        return self.pages.get((route, self.generations[route], key))
+
+    def set(self, route: str, key, html: str, ttl: float | None = None) -> None:
+        self.pages.set((route, self.generations[route], key), html, ttl)
+
+    def invalidate(self, route: str | None = None) -> None:
+        if route is None:
+            self.pages.clear()
+        else:
+            self.generations[route] += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        return {**self.pages.stats(), "invalidations": self.invalidations}
+
+
+page_cache = PageCache(
+    max_entries=settings.PAGE_CACHE_MAX_ENTRIES, ttl=settings.PAGE_CACHE_TTL
+)
@@ -0,0 +1,108 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        mode = zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH
+
+        return self.compressor.compress(data) + self.compressor.flush(mode)
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        head = self.compressor.process(data)
+        if more:
+            return head + self.compressor.flush()
+
+        return head + self.compressor.finish()
+
+
+def choose_encoder(accept_encoding: str):
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return BrotliEncoder
+    if "gzip" in accepted:
+        return GzipEncoder
+
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoder = choose_encoder(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        await CompressionResponder(self.app, self.minimum_size, encoder)(
+            scope, receive, send
+        )
+
+
+class CompressionResponder:
+    def __init__(self, app, minimum_size: int, encoder_class):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoder_class = encoder_class
+        self.encoder = None
+        self.start_message = None
+        self.send = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            if "content-encoding" not in headers and (
+                more_body or len(body) >= self.minimum_size
+            ):
+                self.encoder = self.encoder_class()
+                headers["Content-Encoding"] = self.encoder.name
+                headers.add_vary_header("Accept-Encoding")
+                message["body"] = self.encoder.compress(body, more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(message["body"]))
+            await self.send(start)
+        elif self.encoder is not None:
+            message["body"] = self.encoder.compress(body, more_body)
+
+        await self.send(message)
@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+
+from app.core.static import assets_version
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(
+        "|".join(map(str, (assets_version(), *parts))).encode()
+    ).hexdigest()
+
+    return f'"{digest}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return value.replace(microsecond=0)
+
+
+def validator_headers(
+    etag: str, last_modified: datetime | None, private: bool = False
+) -> dict:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache" if private else "public, no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    if private:
+        headers["Vary"] = "Cookie"
+
+    return headers
+
+
+def is_conditional(request: Request) -> bool:
+    return (
+        "if-none-match" in request.headers or "if-modified-since" in request.headers
+    )
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None
+) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in tags or "*" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    return _as_utc(last_modified) <= _as_utc(since)
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def conditional_html(
+    request: Request,
+    html: str,
+    etag: str,
+    last_modified: datetime | None,
+    private: bool = False,
+) -> Response:
+    headers = validator_headers(etag, last_modified, private)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(headers)
+
+    return HTMLResponse(html, headers=headers)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import find_dotenv, load_dotenv
 
@@ -10,11 +12,92 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
     DB_NAME: str
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    DB_WARMUP_CONNECTIONS: int = 2
+
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_RETRY_AFTER: float = 30.0
+    DB_PRIMARY_PIN_SECONDS: int = 10
+
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0
+
+    FEED_PAGE_SIZE: int = 20
+    USERS_PAGE_SIZE: int = 50
+    SEARCH_PAGE_SIZE: int = 20
+
+    POSTS_PARTITIONS_AHEAD: int = 3
+    POSTS_PARTITION_CHECK_INTERVAL: float = 6 * 60 * 60
+
+    TIMELINE_FAN_OUT_MAX_FOLLOWERS: int = 10_000
+    TIMELINE_BACKFILL: int = 50
+
+    REPOSITORY_BACKEND: Literal["sqlalchemy", "memory"] = "sqlalchemy"
+
+    SESSION_BACKEND: Literal["memory", "database"] = "memory"
+    SESSION_TTL: int = 14 * 24 * 60 * 60
+    SESSION_MAX_ENTRIES: int = 100_000
+    SESSION_CACHE_TTL: int = 30
+    SESSION_CACHE_MAX_ENTRIES: int = 10_000
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 2.0
+
+    RATE_LIMIT_AUTH_PER_MINUTE: float = 10.0
+    RATE_LIMIT_AUTH_BURST: int = 5
+    RATE_LIMIT_POST_PER_MINUTE: float = 30.0
+    RATE_LIMIT_POST_BURST: int = 10
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    FORWARDED_ALLOW_IPS: str = ""
+    MAX_CONCURRENT_REQUESTS: int = 200
+    SHED_POOL_WAIT_MS: float = 100.0
+
+    PAGE_CACHE_MAX_ENTRIES: int = 5_000
+    PAGE_CACHE_TTL: float = 10.0
+    PAGE_CACHE_POST_TTL: float = 3600.0
+
+    POST_GROUP_COMMIT: bool = False
+    POST_GROUP_COMMIT_MAX_BATCH: int = 64
+    POST_GROUP_COMMIT_WINDOW_MS: float = 2.0
+
+    OUTBOX_WORKER: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE: float = 1.0
+    OUTBOX_RETRY_MAX: float = 300.0
+
+    TEMPLATE_CACHE_DIR: str = ".jinja_cache"
+    COMPRESSION_MINIMUM_SIZE: int = 1_000
+
+    STREAM_LISTINGS: bool = True
+    STREAM_CHUNK_SIZE: int = 500
+    STREAM_FIRST_FLUSH_SIZE: int = 2_048
+    STREAM_FLUSH_SIZE: int = 16_384
 
     @property
     def db_url_asyncpg(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def db_replica_urls(self):
+        urls = []
+        for host in filter(None, map(str.strip, self.DB_REPLICA_HOSTS.split(","))):
+            host, _, port = host.partition(":")
+            urls.append(
+                f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{host}:{port or self.DB_PORT}/{self.DB_NAME}"
+            )
+
+        return urls
+
     @property
     def db_url_psycopg(self):
         return f"postgresql+psycopg2://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
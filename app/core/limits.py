@@ -0,0 +1,157 @@
+import math
+import random
+import time
+
+from fastapi import Cookie, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.metrics import registry
+
+POOL_WAIT_SMOOTHING = 0.2
+POOL_WAIT_HALF_LIFE = 1.0
+EXEMPT_PATHS = ("/healthz", "/readyz", "/metrics", "/static/")
+
+admission_requests = registry.counter(
+    "admission_requests_total",
+    "Requests admitted, shed or rate limited, by limit.",
+    labels=("limit", "outcome"),
+)
+
+
+class RateLimiter:
+    def __init__(self, name: str, per_minute: float, burst: int, max_keys: int):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.buckets = LRUCache(
+            max_entries=max_keys, ttl=burst / self.rate if self.rate else 0
+        )
+
+    def acquire(self, keys) -> float:
+        if not self.rate:
+            return 0.0
+
+        now = time.monotonic()
+        available = {}
+        for key in keys:
+            tokens, updated = self.buckets.get(key) or (self.burst, now)
+            available[key] = min(self.burst, tokens + (now - updated) * self.rate)
+
+        shortage = max(1 - tokens for tokens in available.values())
+        if shortage > 0:
+            return shortage / self.rate
+
+        for key, tokens in available.items():
+            self.buckets.set(key, (tokens - 1, now))
+
+        return 0.0
+
+
+def rate_limit(limiter: RateLimiter):
+    async def dependency(
+        request: Request, session_id: str | None = Cookie(default=None)
+    ):
+        keys = [("ip", request.client.host if request.client else None)]
+        if session_id:
+            keys.append(("session", session_id))
+
+        retry_after = limiter.acquire(keys)
+        if retry_after:
+            admission_requests.inc(limiter.name, "rate_limited")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+        admission_requests.inc(limiter.name, "allowed")
+
+    return dependency
+
+
+class PoolWaitAverage:
+    def __init__(self, smoothing: float, half_life: float):
+        self.smoothing = smoothing
+        self.half_life = half_life
+        self.value = 0.0
+        self.updated = time.monotonic()
+
+    def current(self) -> float:
+        elapsed = time.monotonic() - self.updated
+
+        return self.value * 0.5 ** (elapsed / self.half_life)
+
+    def observe(self, seconds: float) -> None:
+        self.value = self.current() + (seconds - self.current()) * self.smoothing
+        self.updated = time.monotonic()
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, max_concurrent: int, shed_pool_wait: float):
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self.shed_pool_wait = shed_pool_wait
+        self.in_flight = 0
+        registry.collector(self.metrics)
+
+    def metrics(self):
+        yield "admission_in_flight", "gauge", "Admitted requests in progress.", [
+            ({}, self.in_flight)
+        ]
+        yield (
+            "admission_pool_wait_seconds",
+            "gauge",
+            "Decaying average of pool checkout wait used for shedding.",
+            [({}, pool_wait.current())],
+        )
+
+    def _shed_reason(self) -> str | None:
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            return "concurrency"
+
+        if self.shed_pool_wait:
+            waited = pool_wait.current()
+            if waited > self.shed_pool_wait and random.random() > (
+                self.shed_pool_wait / waited
+            ):
+                return "pool_wait"
+
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+
+        reason = self._shed_reason()
+        if reason is not None:
+            admission_requests.inc(reason, "shed")
+            response = PlainTextResponse(
+                "Server is busy, try again later",
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            return await response(scope, receive, send)
+
+        admission_requests.inc("server", "admitted")
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+pool_wait = PoolWaitAverage(POOL_WAIT_SMOOTHING, POOL_WAIT_HALF_LIFE)
+auth_limiter = RateLimiter(
+    "auth",
+    settings.RATE_LIMIT_AUTH_PER_MINUTE,
+    settings.RATE_LIMIT_AUTH_BURST,
+    settings.RATE_LIMIT_MAX_KEYS,
+)
+post_limiter = RateLimiter(
+    "post",
+    settings.RATE_LIMIT_POST_PER_MINUTE,
+    settings.RATE_LIMIT_POST_BURST,
+    settings.RATE_LIMIT_MAX_KEYS,
+)
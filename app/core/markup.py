@@ -0,0 +1,18 @@
+from html import unescape
+
+import nh3
+from markdown_it import MarkdownIt
+
+MARKDOWN_VERSION = 2
+
+markdown = MarkdownIt("commonmark", {"html": False}).enable(
+    ["table", "strikethrough"]
+)
+
+
+def render_markdown(body: str) -> str:
+    return nh3.clean(markdown.render(body))
+
+
+def html_text(html: str) -> str:
+    return " ".join(unescape(nh3.clean(html, tags=set())).split())
@@ -0,0 +1,258 @@
+import bisect
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+slow_query_logger = logging.getLogger("app.db.slow")
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for label_values, value in self.values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+            )
+
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [[0] * len(self.buckets), 0, 0.0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        names = (*self.labels, "le")
+        for label_values, (counts, total, value_sum) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(names, (*label_values, bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(names, (*label_values, "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {total}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_count{labels} {total}")
+            lines.append(f"{self.name}_sum{labels} {value_sum}")
+
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+
+        return metric
+
+    def collector(self, func):
+        self.collectors.append(func)
+
+        return func
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    labels = _format_labels(labels.keys(), labels.values())
+                    lines.append(f"{name}{labels} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency, including streaming of the body.",
+    labels=("method", "route", "status"),
+)
+request_queries = registry.histogram(
+    "http_request_db_queries",
+    "Database statements executed per request.",
+    labels=("route",),
+    buckets=COUNT_BUCKETS,
+)
+request_db_time = registry.histogram(
+    "http_request_db_seconds",
+    "Time spent executing database statements per request.",
+    labels=("route",),
+)
+request_render_time = registry.histogram(
+    "http_request_render_seconds",
+    "Time spent rendering templates per request.",
+    labels=("route",),
+)
+request_pool_wait = registry.histogram(
+    "http_request_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection per request.",
+    labels=("route",),
+)
+slow_queries = registry.counter(
+    "db_slow_queries_total",
+    "Statements slower than SLOW_QUERY_THRESHOLD_MS.",
+    labels=("route",),
+)
+
+
+@dataclass
+class RequestStats:
+    scope: dict
+    queries: int = 0
+    db_time: float = 0.0
+    render_time: float = 0.0
+    pool_wait: float = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+
+        return route.path if route is not None else "unmatched"
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def record_render(seconds: float) -> None:
+    stats = request_stats.get()
+    if stats is not None:
+        stats.render_time += seconds
+
+
+def record_pool_wait(seconds: float) -> None:
+    stats = request_stats.get()
+    if stats is not None:
+        stats.pool_wait += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+
+    elapsed = time.perf_counter() - started
+    stats = request_stats.get()
+    route = stats.route if stats is not None else "background"
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        slow_queries.inc(route)
+        if random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+            slow_query_logger.warning(
+                "slow query %.1fms on %s: %s", elapsed * 1000, route, statement
+            )
+
+
+def instrument_engine(engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            route = stats.route
+            request_duration.observe(elapsed, scope["method"], route, status)
+            request_queries.observe(stats.queries, route)
+            request_db_time.observe(stats.db_time, route)
+            request_render_time.observe(stats.render_time, route)
+            request_pool_wait.observe(stats.pool_wait, route)
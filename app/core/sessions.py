@@ -0,0 +1,123 @@
+import secrets
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, update
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.db import async_session
+from app.db.models import LoginSession
+from app.db.notifications import notify_query
+
+
+class SessionStore(ABC):
+    @abstractmethod
+    async def create(self, user_id: int) -> str:
+        pass
+
+    @abstractmethod
+    async def get(self, session_id: str | None) -> int | None:
+        pass
+
+    @abstractmethod
+    async def delete(self, session_id: str | None) -> None:
+        pass
+
+    def forget(self, session_id: str | None) -> None:
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: int, max_entries: int):
+        self.sessions = LRUCache(max_entries=max_entries, ttl=ttl)
+
+    async def create(self, user_id):
+        session_id = secrets.token_hex(16)
+        self.sessions.set(session_id, user_id)
+
+        return session_id
+
+    async def get(self, session_id):
+        if not session_id:
+            return None
+
+        return self.sessions.get(session_id, refresh=True)
+
+    async def delete(self, session_id):
+        self.sessions.pop(session_id)
+
+
+class DatabaseSessionStore(SessionStore):
+    def __init__(self, ttl: int, cache_ttl: int, cache_max_entries: int):
+        self.ttl = timedelta(seconds=ttl)
+        self.cache = LRUCache(max_entries=cache_max_entries, ttl=cache_ttl)
+
+    async def create(self, user_id):
+        session_id = secrets.token_hex(16)
+        now = datetime.now()
+        async with async_session() as db:
+            await db.execute(delete(LoginSession).where(LoginSession.expires_at <= now))
+            db.add(
+                LoginSession(
+                    token=session_id, user_id=user_id, expires_at=now + self.ttl
+                )
+            )
+            await db.commit()
+        self.cache.set(session_id, user_id)
+
+        return session_id
+
+    async def get(self, session_id):
+        if not session_id:
+            return None
+
+        user_id = self.cache.get(session_id)
+        if user_id is not None:
+            return user_id
+
+        now = datetime.now()
+        async with async_session() as db:
+            user_id = await db.scalar(
+                update(LoginSession)
+                .where(LoginSession.token == session_id, LoginSession.expires_at > now)
+                .values(expires_at=now + self.ttl)
+                .returning(LoginSession.user_id)
+            )
+            await db.commit()
+        if user_id is not None:
+            self.cache.set(session_id, user_id)
+
+        return user_id
+
+    async def delete(self, session_id):
+        if not session_id:
+            return
+
+        self.cache.pop(session_id)
+        async with async_session() as db:
+            await db.execute(delete(LoginSession).where(LoginSession.token == session_id))
+            await db.execute(notify_query("session", session_id))
+            await db.commit()
+
+    def forget(self, session_id):
+        if session_id is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(session_id)
+
+
+def create_session_store() -> SessionStore:
+    if settings.SESSION_BACKEND == "database":
+        return DatabaseSessionStore(
+            ttl=settings.SESSION_TTL,
+            cache_ttl=settings.SESSION_CACHE_TTL,
+            cache_max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+        )
+
+    return MemorySessionStore(
+        ttl=settings.SESSION_TTL, max_entries=settings.SESSION_MAX_ENTRIES
+    )
+
+
+session_store = create_session_store()
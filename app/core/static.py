@@ -0,0 +1,44 @@
+import hashlib
+import os
+from functools import cache
+from urllib.parse import parse_qs
+
+from fastapi.staticfiles import StaticFiles
+
+STATIC_DIRECTORY = "static"
+STATIC_PREFIX = "/static"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@cache
+def file_digest(path: str) -> str:
+    with open(os.path.join(STATIC_DIRECTORY, path), "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()[:12]
+
+
+def static_url(path: str) -> str:
+    return f"{STATIC_PREFIX}/{path}?v={file_digest(path)}"
+
+
+@cache
+def assets_version() -> str:
+    digest = hashlib.sha1()
+    for root, _, files in sorted(os.walk(STATIC_DIRECTORY)):
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(root, name), STATIC_DIRECTORY)
+            digest.update(f"{path}:{file_digest(path)}".encode())
+
+    return digest.hexdigest()[:12]
+
+
+class CachedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        version = parse_qs(scope["query_string"].decode("latin-1")).get("v")
+        path = os.path.relpath(full_path, self.directory)
+        if version == [file_digest(path)]:
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "public, no-cache"
+
+        return response
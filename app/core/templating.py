@@ -0,0 +1,98 @@
+import os
+import time
+
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.core.config import settings
+from app.core.metrics import record_render, request_stats
+from app.core.static import static_url
+
+TEMPLATES_DIRECTORY = "templates"
+
+templates = Jinja2Templates(directory=TEMPLATES_DIRECTORY)
+async_env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIRECTORY), autoescape=True, enable_async=True
+)
+
+
+def bytecode_cache(name: str) -> FileSystemBytecodeCache | None:
+    if not settings.TEMPLATE_CACHE_DIR:
+        return None
+
+    directory = os.path.join(settings.TEMPLATE_CACHE_DIR, name)
+    os.makedirs(directory, exist_ok=True)
+
+    return FileSystemBytecodeCache(directory)
+
+
+templates.env.bytecode_cache = bytecode_cache("sync")
+async_env.bytecode_cache = bytecode_cache("async")
+templates.env.globals["static_url"] = static_url
+async_env.globals["static_url"] = static_url
+
+
+def precompile_templates() -> int:
+    names = templates.env.list_templates()
+    for name in names:
+        templates.get_template(name)
+        async_env.get_template(name)
+
+    return len(names)
+
+
+def render_template(name: str, context: dict) -> str:
+    started = time.perf_counter()
+    html = templates.get_template(name).render(context)
+    record_render(time.perf_counter() - started)
+
+    return html
+
+
+async def _timed(pieces):
+    stats = request_stats.get()
+    db_time = stats.db_time if stats is not None else 0.0
+    elapsed = 0.0
+    while True:
+        started = time.perf_counter()
+        try:
+            piece = await anext(pieces)
+        except StopAsyncIteration:
+            break
+        finally:
+            elapsed += time.perf_counter() - started
+
+        yield piece
+
+    if stats is not None:
+        stats.render_time += elapsed - (stats.db_time - db_time)
+
+
+async def stream_template(name: str, context: dict):
+    buffer = []
+    size = 0
+    flush_size = settings.STREAM_FIRST_FLUSH_SIZE
+    pieces = async_env.get_template(name).generate_async(context)
+    async for piece in _timed(pieces):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= flush_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+            flush_size = min(flush_size * 2, settings.STREAM_FLUSH_SIZE)
+
+    if buffer:
+        yield "".join(buffer)
+
+
+async def listing_response(name: str, context: dict, headers: dict | None = None):
+    if settings.STREAM_LISTINGS:
+        return StreamingResponse(
+            stream_template(name, context), media_type="text/html", headers=headers
+        )
+
+    html = "".join([piece async for piece in stream_template(name, context)])
+
+    return HTMLResponse(html, headers=headers)
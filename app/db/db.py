@@ -1,30 +1,179 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import logging
+import time
+from functools import cache
+
+from fastapi import Cookie, Depends
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.limits import pool_wait
+from app.core.metrics import instrument_engine, record_pool_wait
+
+logger = logging.getLogger("app.db")
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            return super()._do_get()
+        finally:
+            self.waiting -= 1
+            waited = time.perf_counter() - started
+            record_pool_wait(waited)
+            pool_wait.observe(waited)
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+def create_instrumented_engine(url: str):
+    engine = create_async_engine(
+        url=url,
+        echo=settings.DB_ECHO,
+        poolclass=TimedAsyncQueuePool,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        },
+        **pool_options(),
+    )
+    instrument_engine(engine.sync_engine)
+
+    return engine
+
 
-sync_engine = create_engine(
-    url=settings.db_url_psycopg,
-    echo=True,
-    pool_size=5,
-    max_overflow=10,
-)
-async_engine = create_async_engine(
-    url=settings.db_url_asyncpg,
-    echo=True,
-    pool_size=5,
-    max_overflow=10,
-)
-sync_session = sessionmaker(sync_engine, autoflush=False, autocommit=False)
+async_engine = create_instrumented_engine(settings.db_url_asyncpg)
 async_session = async_sessionmaker(async_engine, class_=AsyncSession)
 
 
+class ReplicaSet:
+    def __init__(self, urls: list[str], retry_after: float):
+        self.engines = [create_instrumented_engine(url) for url in urls]
+        self.sessions = [
+            async_sessionmaker(engine, class_=AsyncSession) for engine in self.engines
+        ]
+        self.retry_after = retry_after
+        self.down_until = [0.0] * len(self.engines)
+        self.position = itertools.count()
+        for index, engine in enumerate(self.engines):
+            event.listen(engine.sync_engine, "handle_error", self._on_error(index))
+
+    def _on_error(self, index: int):
+        def handle_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index)
+
+        return handle_error
+
+    def mark_down(self, index: int) -> None:
+        if self.down_until[index] <= time.monotonic():
+            logger.warning("replica %s is unavailable", self.engines[index].url.host)
+        self.down_until[index] = time.monotonic() + self.retry_after
+
+    def choose(self) -> async_sessionmaker:
+        now = time.monotonic()
+        for _ in range(len(self.sessions)):
+            index = next(self.position) % len(self.sessions)
+            if self.down_until[index] <= now:
+                return self.sessions[index]
+
+        return async_session
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+
+replicas = ReplicaSet(settings.db_replica_urls, settings.DB_REPLICA_RETRY_AFTER)
+
+
+@cache
+def get_sync_engine():
+    return create_engine(
+        url=settings.db_url_psycopg, echo=settings.DB_ECHO, **pool_options()
+    )
+
+
 def get_sync_db():
-    with sync_session() as session:
+    with sessionmaker(get_sync_engine(), autoflush=False)() as session:
         yield session
 
 
 async def get_async_db():
     async with async_session() as session:
         yield session
+
+
+def get_reader(primary_pin: str | None = Cookie(default=None)) -> async_sessionmaker:
+    if primary_pin:
+        return async_session
+
+    return replicas.choose()
+
+
+async def get_read_db(reader: async_sessionmaker = Depends(get_reader)):
+    async with reader() as session:
+        yield session
+
+
+async def warm_up(engine, connections: int) -> None:
+    opened = await asyncio.gather(
+        *(engine.connect().start() for _ in range(connections)),
+        return_exceptions=True,
+    )
+    for conn in opened:
+        if not isinstance(conn, BaseException):
+            await conn.close()
+
+    for conn in opened:
+        if isinstance(conn, BaseException):
+            raise conn
+
+
+async def warm_up_pools(connections: int) -> None:
+    for engine in (async_engine, *replicas.engines):
+        try:
+            await warm_up(engine, connections)
+        except Exception:
+            logger.exception("could not warm up the pool of %s", engine.url.host)
+
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    await replicas.dispose()
+    if get_sync_engine.cache_info().currsize:
+        get_sync_engine().dispose()
+
+
+async def ping(engine=async_engine) -> None:
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("SELECT 1")
+
+
+def pool_status(engine=async_engine) -> dict:
+    pool = engine.pool
+
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "waiting": getattr(pool, "waiting", 0),
+    }
@@ -1,8 +1,23 @@
 from datetime import datetime
 from typing import List
 
-from passlib.context import CryptContext
-from sqlalchemy import TIMESTAMP, String, Boolean, func, ForeignKey
+from sqlalchemy import (
+    TIMESTAMP,
+    String,
+    Boolean,
+    Column,
+    Computed,
+    Integer,
+    func,
+    false,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Table,
+    Text,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import (
     declared_attr,
     DeclarativeBase,
@@ -11,7 +26,12 @@ from sqlalchemy.orm import (
     relationship,
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+EXCERPT_LENGTH = 60
+SEARCH_CONFIG = "russian"
+
+
+def make_excerpt(body: str) -> tuple[str, bool]:
+    return body[:EXCERPT_LENGTH], len(body) > EXCERPT_LENGTH
 
 
 class Base(DeclarativeBase):
@@ -37,32 +57,60 @@ class Base(DeclarativeBase):
 
 
 class User(Base):
-    username: Mapped[str] = mapped_column(String(20), nullable=False)
+    username: Mapped[str] = mapped_column(
+        String(20), nullable=False, unique=True, index=True
+    )
     password: Mapped[str] = mapped_column(String(60), nullable=False)  # pw hash
     role: Mapped[str] = mapped_column(String(10), nullable=False, default="user")
     recent_post_at: Mapped[datetime | None] = mapped_column(TIMESTAMP, default=None)
     is_blocked: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    post_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    follower_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     posts: Mapped[List["Post"]] = relationship(back_populates="author")
 
-    def verify_password(self, pw: str) -> bool:
-        return pwd_context.verify(pw, self.password)
-
-    def set_password(self, pw: str) -> None:
-        self.password = pwd_context.hash(pw)
-
     def __repr__(self) -> str:
         return (
             f"<{self.__class__.__name__}(id={self.id}, created_at={self.created_at}, updated_at={self.updated_at}),"
             f"username={self.username}, role={self.role}, recent_post_at={self.recent_post_at},"
-            f"is_blocked={self.is_blocked}, posts={self.posts}>"
+            f"is_blocked={self.is_blocked}, post_count={self.post_count}, posts={self.posts}>"
         )
 
 
 class Post(Base):
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP,
+        primary_key=True,
+        server_default=func.now(),
+    )
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     body: Mapped[str] = mapped_column(String)
+    excerpt: Mapped[str] = mapped_column(
+        String(EXCERPT_LENGTH), nullable=False, default="", server_default=""
+    )
+    excerpt_has_more: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+    body_html: Mapped[str | None] = mapped_column(Text, default=None)
+    body_html_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(body, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     author: Mapped[User] = relationship(back_populates="posts")
 
@@ -71,3 +119,93 @@ class Post(Base):
             f"<{self.__class__.__name__}(id={self.id}, created_at={self.created_at}, updated_at={self.updated_at}),"
             f"author_id={self.author_id}, title={self.title}, body={self.body[:10]}, author={self.author}>"
         )
+
+
+class LoginSession(Base):
+    __tablename__ = "sessions"
+
+    token: Mapped[str] = mapped_column(
+        String(64), nullable=False, unique=True, index=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, nullable=False, index=True
+    )
+
+
+class Follow(Base):
+    __table_args__ = (UniqueConstraint("follower_id", "followee_id"),)
+
+    follower_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    followee_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+
+
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["post_id", "post_created_at"],
+            ["posts.id", "posts.created_at"],
+            ondelete="CASCADE",
+        ),
+        UniqueConstraint("user_id", "post_id"),
+    )
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    post_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    author_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    post_created_at: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=False)
+
+
+class OutboxJob(Base):
+    __tablename__ = "outbox"
+
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    run_after: Mapped[datetime] = mapped_column(
+        TIMESTAMP, nullable=False, server_default=func.now(), index=True
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, default=None)
+
+
+post_locations = Table(
+    "post_locations",
+    Base.metadata,
+    Column("post_id", Integer, primary_key=True),
+    Column("created_at", TIMESTAMP, nullable=False),
+)
+
+
+Index(
+    "ix_users_leaderboard",
+    User.post_count.desc(),
+    User.recent_post_at.desc(),
+    User.created_at.desc(),
+    User.id.desc(),
+)
+Index("ix_posts_created_at_id", Post.created_at.desc(), Post.id.desc())
+Index("ix_posts_author_id_created_at", Post.author_id, Post.created_at, Post.id)
+Index(
+    "ix_timeline_entries_user_id_post",
+    TimelineEntry.user_id,
+    TimelineEntry.post_created_at,
+    TimelineEntry.post_id,
+)
+Index("ix_posts_search_vector", Post.search_vector, postgresql_using="gin")
+Index(
+    "ix_posts_title_trgm",
+    Post.title,
+    postgresql_using="gin",
+    postgresql_ops={"title": "gin_trgm_ops"},
+)
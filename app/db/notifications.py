@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+CHANNEL = "blog_invalidate"
+RETRY_AFTER = 5.0
+
+logger = logging.getLogger("app.db")
+
+
+def notify_query(topic: str, key: str = ""):
+    return select(func.pg_notify(CHANNEL, f"{topic}:{key}"))
+
+
+def dispatch(handlers: dict, payload: str | None) -> None:
+    if payload is None:
+        for handler in handlers.values():
+            handler(None)
+        return
+
+    topic, _, key = payload.partition(":")
+    handler = handlers.get(topic)
+    if handler is not None:
+        handler(key or None)
+
+
+async def listen(conn, handlers: dict) -> None:
+    driver = (await conn.get_raw_connection()).driver_connection
+    payloads = asyncio.Queue()
+    driver.add_termination_listener(
+        lambda connection: payloads.put_nowait(ConnectionError("connection lost"))
+    )
+    await driver.add_listener(
+        CHANNEL,
+        lambda connection, pid, channel, payload: payloads.put_nowait(payload),
+    )
+    dispatch(handlers, None)
+    while not isinstance(payload := await payloads.get(), Exception):
+        dispatch(handlers, payload)
+
+    raise payload
+
+
+async def listen_for_invalidations(url: str, handlers: dict) -> None:
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    await listen(conn, handlers)
+            except Exception:
+                logger.exception("invalidation listener failed, retrying")
+
+            await asyncio.sleep(RETRY_AFTER)
+    finally:
+        await engine.dispose()
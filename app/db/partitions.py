@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import re
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+PARTITION_NAME = re.compile(r"^posts_(\d{4})_(\d{2})$")
+PARTITIONS_LOCK = 7_140_215
+
+logger = logging.getLogger("app.db")
+
+LIST_PARTITIONS = text(
+    "SELECT inhrelid::regclass::text FROM pg_inherits "
+    "WHERE inhparent = 'posts'::regclass"
+)
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"posts_{month:%Y_%m}"
+
+
+async def list_partitions(conn) -> list[tuple[str, date]]:
+    partitions = []
+    for name in await conn.scalars(LIST_PARTITIONS):
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+async def ensure_partitions(conn, first: date | datetime, last: date | datetime):
+    await conn.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITIONS_LOCK}
+    )
+    existing = {name for name, _ in await list_partitions(conn)}
+    month, last = month_start(first), month_start(last)
+    created = []
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF posts "
+                    f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+                )
+            )
+            created.append(name)
+        month = add_months(month, 1)
+
+    return created
+
+
+async def create_future_partitions(conn) -> list[str]:
+    now = datetime.now()
+
+    return await ensure_partitions(
+        conn, now, add_months(month_start(now), settings.POSTS_PARTITIONS_AHEAD)
+    )
+
+
+async def maintain_partitions(engine, interval: float) -> None:
+    while True:
+        try:
+            async with engine.begin() as conn:
+                created = await create_future_partitions(conn)
+            if created:
+                logger.info("created posts partitions %s", ", ".join(created))
+        except Exception:
+            logger.exception("posts partition maintenance failed")
+
+        await asyncio.sleep(interval)
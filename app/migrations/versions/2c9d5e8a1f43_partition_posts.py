@@ -0,0 +1,188 @@
+"""partition posts
+
+Revision ID: 2c9d5e8a1f43
+Revises: 6b1f8c3a5e27
+Create Date: 2026-10-18 17:26:35.118402
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2c9d5e8a1f43"
+down_revision: Union[str, None] = "6b1f8c3a5e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS_AHEAD = 3
+
+POST_COLUMNS = (
+    "id, author_id, title, body, excerpt, excerpt_has_more, body_html, "
+    "body_html_version, created_at, updated_at"
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_posts_table(partition_by: str = "") -> None:
+    op.execute(
+        f"""
+        CREATE TABLE posts (
+            author_id integer NOT NULL REFERENCES users (id),
+            title varchar(100) NOT NULL,
+            body varchar NOT NULL,
+            excerpt varchar(60) NOT NULL DEFAULT '',
+            excerpt_has_more boolean NOT NULL DEFAULT false,
+            body_html text,
+            body_html_version integer NOT NULL DEFAULT 0,
+            search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('russian', coalesce(body, '')), 'B')
+            ) STORED,
+            id integer NOT NULL DEFAULT nextval('posts_id_seq'),
+            created_at timestamp NOT NULL DEFAULT now(),
+            updated_at timestamp NOT NULL DEFAULT now(),
+            PRIMARY KEY ({'id, created_at' if partition_by else 'id'})
+        ) {partition_by}
+        """
+    )
+
+
+def create_posts_indexes() -> None:
+    op.create_index(
+        "ix_posts_created_at_id",
+        "posts",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_posts_author_id_created_at", "posts", ["author_id", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_posts_search_vector", "posts", ["search_vector"], postgresql_using="gin"
+    )
+    op.create_index(
+        "ix_posts_title_trgm",
+        "posts",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+
+
+def rename_old_posts() -> None:
+    op.execute(
+        "ALTER TABLE timeline_entries DROP CONSTRAINT timeline_entries_post_id_fkey"
+    )
+    op.execute("ALTER SEQUENCE posts_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE posts RENAME TO posts_old")
+    for index in (
+        "posts_pkey",
+        "ix_posts_created_at_id",
+        "ix_posts_author_id_created_at",
+        "ix_posts_search_vector",
+        "ix_posts_title_trgm",
+    ):
+        op.execute(f"ALTER INDEX {index} RENAME TO {index}_old")
+
+
+def move_old_posts() -> None:
+    op.execute(
+        f"INSERT INTO posts ({POST_COLUMNS}) SELECT {POST_COLUMNS} FROM posts_old"
+    )
+    op.execute("DROP TABLE posts_old")
+    op.execute("ALTER SEQUENCE posts_id_seq OWNED BY posts.id")
+
+
+def upgrade() -> None:
+    rename_old_posts()
+    create_posts_table("PARTITION BY RANGE (created_at)")
+
+    first = op.get_bind().scalar(
+        sa.text(
+            "SELECT date_trunc('month', coalesce(min(created_at), now())) "
+            "FROM posts_old"
+        )
+    )
+    now = op.get_bind().scalar(sa.text("SELECT date_trunc('month', now())"))
+    month, last = first.date(), add_months(now.date(), PARTITIONS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE posts_{month:%Y_%m} PARTITION OF posts "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+
+    move_old_posts()
+    create_posts_indexes()
+    op.execute(
+        "ALTER TABLE timeline_entries ADD CONSTRAINT timeline_entries_post_id_fkey "
+        "FOREIGN KEY (post_id, post_created_at) REFERENCES posts (id, created_at) "
+        "ON DELETE CASCADE"
+    )
+
+    op.create_table(
+        "post_locations",
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), nullable=False),
+        sa.PrimaryKeyConstraint("post_id"),
+    )
+    op.execute("INSERT INTO post_locations SELECT id, created_at FROM posts")
+    op.execute(
+        """
+        CREATE FUNCTION post_locations_insert() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO post_locations SELECT id, created_at FROM new_posts;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION post_locations_delete() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM post_locations USING old_posts
+            WHERE post_locations.post_id = old_posts.id;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER post_locations_insert AFTER INSERT ON posts "
+        "REFERENCING NEW TABLE AS new_posts "
+        "FOR EACH STATEMENT EXECUTE FUNCTION post_locations_insert()"
+    )
+    op.execute(
+        "CREATE TRIGGER post_locations_delete AFTER DELETE ON posts "
+        "REFERENCING OLD TABLE AS old_posts "
+        "FOR EACH STATEMENT EXECUTE FUNCTION post_locations_delete()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER post_locations_delete ON posts")
+    op.execute("DROP TRIGGER post_locations_insert ON posts")
+    op.execute("DROP FUNCTION post_locations_delete()")
+    op.execute("DROP FUNCTION post_locations_insert()")
+    op.drop_table("post_locations")
+
+    rename_old_posts()
+    create_posts_table()
+    move_old_posts()
+    create_posts_indexes()
+    op.execute(
+        "ALTER TABLE timeline_entries ADD CONSTRAINT timeline_entries_post_id_fkey "
+        "FOREIGN KEY (post_id) REFERENCES posts (id) ON DELETE CASCADE"
+    )
@@ -0,0 +1,57 @@
+"""query indexes
+
+Revision ID: 3d1f7a9c2b64
+Revises: b96867a4e203
+Create Date: 2026-10-18 10:12:41.530214
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3d1f7a9c2b64"
+down_revision: Union[str, None] = "b96867a4e203"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_posts_created_at_id",
+            "posts",
+            [sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_posts_author_id_created_at",
+            "posts",
+            ["author_id", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_username",
+            "users",
+            ["username"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_username", table_name="users", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_posts_author_id_created_at",
+            table_name="posts",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_posts_created_at_id", table_name="posts", postgresql_concurrently=True
+        )
@@ -0,0 +1,89 @@
+"""follows
+
+Revision ID: 4a0c7e2d9b16
+Revises: 91f3d6a2e7c8
+Create Date: 2026-10-18 15:21:07.318240
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4a0c7e2d9b16"
+down_revision: Union[str, None] = "91f3d6a2e7c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "follower_count", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.create_table(
+        "follows",
+        sa.Column("follower_id", sa.Integer(), nullable=False),
+        sa.Column("followee_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["followee_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["follower_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("follower_id", "followee_id"),
+    )
+    op.create_index("ix_follows_followee_id", "follows", ["followee_id"])
+    op.create_table(
+        "timeline_entries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=False),
+        sa.Column("post_created_at", sa.TIMESTAMP(), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["post_id"], ["posts.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_timeline_entries_user_id_post",
+        "timeline_entries",
+        ["user_id", "post_created_at", "post_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_timeline_entries_user_id_post", table_name="timeline_entries"
+    )
+    op.drop_table("timeline_entries")
+    op.drop_index("ix_follows_followee_id", table_name="follows")
+    op.drop_table("follows")
+    op.drop_column("users", "follower_count")
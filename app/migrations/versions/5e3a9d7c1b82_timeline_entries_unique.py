@@ -0,0 +1,41 @@
+"""timeline entries unique
+
+Revision ID: 5e3a9d7c1b82
+Revises: 2c9d5e8a1f43
+Create Date: 2026-10-18 18:42:13.604281
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e3a9d7c1b82"
+down_revision: Union[str, None] = "2c9d5e8a1f43"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DELETE FROM timeline_entries AS duplicate
+        USING timeline_entries AS kept
+        WHERE duplicate.user_id = kept.user_id
+          AND duplicate.post_id = kept.post_id
+          AND duplicate.id > kept.id
+        """
+    )
+    op.create_unique_constraint(
+        "timeline_entries_user_id_post_id_key",
+        "timeline_entries",
+        ["user_id", "post_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "timeline_entries_user_id_post_id_key", "timeline_entries", type_="unique"
+    )
@@ -0,0 +1,34 @@
+"""post body html
+
+Revision ID: 6b1f8c3a5e27
+Revises: d27b9e5c4f10
+Create Date: 2026-10-18 16:41:12.530968
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6b1f8c3a5e27"
+down_revision: Union[str, None] = "d27b9e5c4f10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("posts", sa.Column("body_html", sa.Text(), nullable=True))
+    op.add_column(
+        "posts",
+        sa.Column(
+            "body_html_version", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "body_html_version")
+    op.drop_column("posts", "body_html")
@@ -0,0 +1,58 @@
+"""users post_count
+
+Revision ID: 7b2e04c9d815
+Revises: 3d1f7a9c2b64
+Create Date: 2026-10-18 11:03:17.846012
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2e04c9d815"
+down_revision: Union[str, None] = "3d1f7a9c2b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("post_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET post_count = counts.post_count
+        FROM (
+            SELECT author_id, count(*) AS post_count
+            FROM posts
+            GROUP BY author_id
+        ) AS counts
+        WHERE users.id = counts.author_id
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_leaderboard",
+            "users",
+            [
+                sa.text("post_count DESC"),
+                sa.text("recent_post_at DESC"),
+                sa.text("created_at DESC"),
+                sa.text("id DESC"),
+            ],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_leaderboard", table_name="users", postgresql_concurrently=True
+        )
+    op.drop_column("users", "post_count")
@@ -0,0 +1,45 @@
+"""posts excerpt
+
+Revision ID: c5a86e13f0d2
+Revises: 7b2e04c9d815
+Create Date: 2026-10-18 11:48:02.377519
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5a86e13f0d2"
+down_revision: Union[str, None] = "7b2e04c9d815"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column(
+            "excerpt", sa.String(length=60), server_default="", nullable=False
+        ),
+    )
+    op.add_column(
+        "posts",
+        sa.Column(
+            "excerpt_has_more",
+            sa.Boolean(),
+            server_default=sa.false(),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        "UPDATE posts SET excerpt = left(body, 60), excerpt_has_more = length(body) > 60"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "excerpt_has_more")
+    op.drop_column("posts", "excerpt")
@@ -0,0 +1,89 @@
+import asyncio
+from collections import Counter
+
+from sqlalchemy import TIMESTAMP, Integer, column, func, insert, update, values
+
+from app.core.config import settings
+from app.db.db import async_session
+from app.db.models import User, Post
+from app.repositories.outbox import post_published_query
+
+
+class PostBatcher:
+    def __init__(self, session_factory, max_batch: int, window: float):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.window = window
+        self.queue = None
+        self.task = None
+
+    async def submit(self, post: dict) -> int:
+        if self.task is None or self.task.done():
+            self.queue = asyncio.Queue()
+            self.task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((post, future))
+
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.window:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list) -> None:
+        try:
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    insert(Post).returning(
+                        Post.id,
+                        Post.author_id,
+                        Post.created_at,
+                        sort_by_parameter_order=True,
+                    ),
+                    [post for post, _ in batch],
+                )
+                posts = result.all()
+                published = values(
+                    column("id", Integer),
+                    column("created_at", TIMESTAMP),
+                    name="published",
+                ).data([(post.id, post.created_at) for post in posts])
+                await db.execute(post_published_query(published))
+                added = values(
+                    column("author_id", Integer),
+                    column("added", Integer),
+                    name="added_posts",
+                ).data(list(Counter(post.author_id for post in posts).items()))
+                await db.execute(
+                    update(User)
+                    .where(User.id == added.c.author_id)
+                    .values(
+                        post_count=User.post_count + added.c.added,
+                        recent_post_at=func.now(),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), post in zip(batch, posts):
+            if not future.done():
+                future.set_result(post.id)
+
+
+post_batcher = PostBatcher(
+    async_session,
+    settings.POST_GROUP_COMMIT_MAX_BATCH,
+    settings.POST_GROUP_COMMIT_WINDOW_MS / 1000,
+)
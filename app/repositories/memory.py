@@ -0,0 +1,484 @@
+import bisect
+import heapq
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import count
+from types import SimpleNamespace
+from typing import NamedTuple
+
+from fastapi import HTTPException
+from fastapi.responses import RedirectResponse
+
+from app.core.cache import page_cache
+from app.core.conditional import (
+    is_not_modified,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.core.sessions import session_store
+from app.core.templating import listing_response, templates
+from app.repositories.pagination import build_page, keyset_slice
+from app.repositories.repository import (
+    SEARCH_MIN_LENGTH,
+    SEARCH_TRIGRAM_MAX_LENGTH,
+    BlogRepository,
+    new_post_values,
+    pin_to_primary,
+)
+
+WORD = re.compile(r"\w+")
+TITLE_WEIGHT = 1.0
+BODY_WEIGHT = 0.4
+
+
+class Record(SimpleNamespace):
+    @property
+    def _mapping(self):
+        return vars(self)
+
+
+class Rows(list):
+    has_more = False
+
+
+class PostKey(NamedTuple):
+    created_at: datetime
+    id: int
+
+
+@dataclass
+class StoredUser:
+    id: int
+    username: str
+    password: str
+    role: str
+    created_at: datetime
+    updated_at: datetime
+    recent_post_at: datetime | None = None
+    post_count: int = 0
+    follower_count: int = 0
+
+
+@dataclass
+class StoredPost:
+    id: int
+    author_id: int
+    title: str
+    body: str
+    excerpt: str
+    excerpt_has_more: bool
+    body_html: str | None
+    body_html_version: int
+    created_at: datetime
+    updated_at: datetime
+
+
+def leaderboard_key(user: StoredUser) -> tuple:
+    recent = user.recent_post_at
+
+    return (
+        -user.post_count,
+        recent is not None,
+        -recent.timestamp() if recent else 0.0,
+        -user.created_at.timestamp(),
+        -user.id,
+    )
+
+
+def trigrams(text: str) -> set[str]:
+    grams = set()
+    for word in WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+
+    return grams
+
+
+def similarity(left: str, right: str) -> float:
+    left, right = trigrams(left), trigrams(right)
+    union = left | right
+
+    return len(left & right) / len(union) if union else 0.0
+
+
+class MemoryStore:
+    def __init__(self):
+        self.users = {}
+        self.usernames = {}
+        self.posts = {}
+        self.feed = []
+        self.author_posts = {}
+        self.leaderboard = []
+        self.following = {}
+        self.user_ids = count(1)
+        self.post_ids = count(1)
+
+    def add_user(self, username, password, role="user", created_at=None):
+        if username in self.usernames:
+            return None
+
+        now = created_at or datetime.now()
+        user = StoredUser(next(self.user_ids), username, password, role, now, now)
+        self.users[user.id] = user
+        self.usernames[username] = user.id
+        bisect.insort(self.leaderboard, leaderboard_key(user))
+
+        return user
+
+    def update_user(self, user: StoredUser, **changes) -> None:
+        index = bisect.bisect_left(self.leaderboard, leaderboard_key(user))
+        del self.leaderboard[index]
+        for name, value in changes.items():
+            setattr(user, name, value)
+        user.updated_at = datetime.now()
+        bisect.insort(self.leaderboard, leaderboard_key(user))
+
+    def _insert_post(self, values: dict) -> StoredPost:
+        created_at = values.get("created_at") or datetime.now()
+        post = StoredPost(
+            id=next(self.post_ids),
+            author_id=values["author_id"],
+            title=values["title"],
+            body=values["body"],
+            excerpt=values["excerpt"],
+            excerpt_has_more=values["excerpt_has_more"],
+            body_html=values.get("body_html"),
+            body_html_version=values.get("body_html_version", 0),
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        self.posts[post.id] = post
+
+        return post
+
+    def add_post(self, values: dict) -> StoredPost:
+        author = self.users[values["author_id"]]
+        post = self._insert_post(values)
+        key = PostKey(post.created_at, post.id)
+        bisect.insort(self.feed, key)
+        bisect.insort(self.author_posts.setdefault(post.author_id, []), key)
+        self.update_user(
+            author,
+            post_count=author.post_count + 1,
+            recent_post_at=post.created_at,
+        )
+
+        return post
+
+    def load_posts(self, posts) -> int:
+        loaded = 0
+        for values in posts:
+            post = self._insert_post(values)
+            key = PostKey(post.created_at, post.id)
+            self.feed.append(key)
+            self.author_posts.setdefault(post.author_id, []).append(key)
+            loaded += 1
+
+        self.feed.sort()
+        for author_id, keys in self.author_posts.items():
+            keys.sort()
+            author = self.users[author_id]
+            author.post_count = len(keys)
+            author.recent_post_at = keys[-1].created_at
+        self.leaderboard = sorted(map(leaderboard_key, self.users.values()))
+
+        return loaded
+
+    def follow(self, follower_id: int, followee_id: int) -> bool:
+        followee = self.users.get(followee_id)
+        followed = self.following.setdefault(follower_id, set())
+        if followee is None or followee_id in followed:
+            return False
+
+        followed.add(followee_id)
+        self.update_user(followee, follower_count=followee.follower_count + 1)
+
+        return True
+
+    def unfollow(self, follower_id: int, followee_id: int) -> bool:
+        followed = self.following.get(follower_id, set())
+        if followee_id not in followed:
+            return False
+
+        followed.discard(followee_id)
+        followee = self.users[followee_id]
+        self.update_user(followee, follower_count=followee.follower_count - 1)
+
+        return True
+
+
+class InMemoryBlogRepository(BlogRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def post_summary(self, key) -> Record:
+        post = self.store.posts[key.id]
+
+        return Record(
+            id=post.id,
+            author_id=post.author_id,
+            title=post.title,
+            excerpt=post.excerpt,
+            excerpt_has_more=post.excerpt_has_more,
+            created_at=post.created_at,
+            updated_at=post.updated_at,
+            username=self.store.users[post.author_id].username,
+        )
+
+    def user_post(self, key) -> Record:
+        post = self.store.posts[key.id]
+
+        return Record(
+            id=post.id,
+            title=post.title,
+            created_at=post.created_at,
+            excerpt=post.excerpt,
+            excerpt_has_more=post.excerpt_has_more,
+        )
+
+    def user_summary(self, key) -> Record:
+        user = self.store.users[-key[-1]]
+
+        return Record(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            created_at=user.created_at,
+            recent_post_at=user.recent_post_at,
+            post_count=user.post_count,
+            follower_count=user.follower_count,
+        )
+
+    def users_page(self, page, page_size) -> Rows:
+        start = (page - 1) * page_size
+        keys = self.store.leaderboard[start : start + page_size + 1]
+        users = Rows(map(self.user_summary, keys[:page_size]))
+        users.has_more = len(keys) > page_size
+
+        return users
+
+    async def register_user(self, username, password):
+        user = None
+        if username not in self.store.usernames:
+            password = await password_hasher.hash(password)
+            user = self.store.add_user(username, password)
+        if user is None:
+            raise HTTPException(status_code=400, detail="Username already exists")
+
+        return RedirectResponse(url="/api/login/", status_code=303)
+
+    async def login_user(self, username, password):
+        user = self.store.users.get(self.store.usernames.get(username))
+        if not user:
+            raise HTTPException(status_code=400, detail="Invalid username or password")
+
+        verified, new_hash = await password_hasher.verify_and_update(
+            password, user.password
+        )
+        if not verified:
+            raise HTTPException(status_code=400, detail="Invalid username or password")
+
+        if new_hash:
+            user.password = new_hash
+
+        session_id = await session_store.create(user.id)
+
+        response = RedirectResponse(url="/api/blog", status_code=303)
+        response.set_cookie(key="session_id", value=session_id, httponly=True)
+
+        return response
+
+    async def create_post(self, title, body, session_id):
+        user_id = await session_store.get(session_id)
+        if user_id is None:
+            return RedirectResponse(url="/api/login/", status_code=303)
+
+        post = self.store.add_post(new_post_values(user_id, title, body))
+        page_cache.invalidate("feed")
+
+        return pin_to_primary(
+            RedirectResponse(url=f"/api/blog/{post.id}/", status_code=303)
+        )
+
+    async def get_all_users(self, request, page=1):
+        users = self.users_page(page, settings.USERS_PAGE_SIZE)
+
+        return await listing_response(
+            "users_all.html", {"request": request, "users": users, "page": page}
+        )
+
+    async def get_user(self, request, user_id, session_id):
+        viewer = await session_store.get(session_id)
+        owner = viewer == user_id
+
+        user = await self.fetch_user(user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        following = None
+        if viewer is not None and not owner:
+            following = user_id in self.store.following.get(viewer, ())
+
+        etag = make_etag("user", user_id, user.updated_at, owner, following)
+        headers = validator_headers(etag, user.updated_at, private=True)
+        if is_not_modified(request, etag, user.updated_at):
+            return not_modified(headers)
+
+        keys = self.store.author_posts.get(user_id, [])
+        posts = map(self.user_post, keys[::-1])
+
+        return await listing_response(
+            "user_profile.html",
+            {
+                "request": request,
+                "user": user,
+                "owner": owner,
+                "following": following,
+                "posts": posts,
+            },
+            headers=headers,
+        )
+
+    async def search_posts(self, request, query, page=1):
+        query = query.strip()
+        page_size = settings.SEARCH_PAGE_SIZE
+        posts = []
+        if len(query) >= SEARCH_MIN_LENGTH:
+            if len(query) <= SEARCH_TRIGRAM_MAX_LENGTH and " " not in query:
+                needle = query.lower()
+                ranked = [
+                    (similarity(post.title, query), post.id)
+                    for post in self.store.posts.values()
+                    if needle in post.title.lower()
+                ]
+            else:
+                words = WORD.findall(query.lower())
+                ranked = []
+                for post in self.store.posts.values():
+                    title, body = post.title.lower(), post.body.lower()
+                    if words and all(w in title or w in body for w in words):
+                        rank = sum(
+                            TITLE_WEIGHT * title.count(w) + BODY_WEIGHT * body.count(w)
+                            for w in words
+                        )
+                        ranked.append((rank, post.id))
+
+            start = (page - 1) * page_size
+            ranked = heapq.nlargest(start + page_size + 1, ranked)[start:]
+            posts = [
+                self.post_summary(self.store.posts[post_id]) for _, post_id in ranked
+            ]
+
+        return templates.TemplateResponse(
+            "search_results.html",
+            {
+                "request": request,
+                "query": query,
+                "posts": posts[:page_size],
+                "page": page,
+                "has_next": len(posts) > page_size,
+            },
+        )
+
+    async def follow_user(self, user_id, session_id):
+        follower_id = await session_store.get(session_id)
+        if follower_id is None:
+            return RedirectResponse(url="/api/login/", status_code=303)
+
+        if follower_id != user_id:
+            self.store.follow(follower_id, user_id)
+
+        return pin_to_primary(
+            RedirectResponse(url=f"/api/users/{user_id}/", status_code=303)
+        )
+
+    async def unfollow_user(self, user_id, session_id):
+        follower_id = await session_store.get(session_id)
+        if follower_id is None:
+            return RedirectResponse(url="/api/login/", status_code=303)
+
+        self.store.unfollow(follower_id, user_id)
+
+        return pin_to_primary(
+            RedirectResponse(url=f"/api/users/{user_id}/", status_code=303)
+        )
+
+    async def fetch_feed(self, before=None, after=None, limit=None):
+        page_size = limit or settings.FEED_PAGE_SIZE
+        keys = keyset_slice(self.store.feed, before, after, page_size)
+
+        return build_page(list(map(self.post_summary, keys)), before, after, page_size)
+
+    async def fetch_post(self, post_id):
+        post = self.store.posts.get(post_id)
+        if post is None:
+            return None
+
+        return Record(
+            id=post.id,
+            author_id=post.author_id,
+            title=post.title,
+            body=post.body,
+            body_html=post.body_html,
+            created_at=post.created_at,
+            updated_at=post.updated_at,
+            username=self.store.users[post.author_id].username,
+        )
+
+    async def fetch_post_updated_at(self, post_id):
+        post = self.store.posts.get(post_id)
+
+        return post.updated_at if post else None
+
+    async def fetch_users(self, page=1, limit=None):
+        users = self.users_page(page, limit or settings.USERS_PAGE_SIZE)
+
+        return list(users), users.has_more
+
+    async def fetch_user(self, user_id):
+        user = self.store.users.get(user_id)
+        if user is None:
+            return None
+
+        return Record(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            recent_post_at=user.recent_post_at,
+            post_count=user.post_count,
+            follower_count=user.follower_count,
+        )
+
+    async def fetch_user_posts(self, user_id, before=None, after=None, limit=None):
+        page_size = limit or settings.FEED_PAGE_SIZE
+        keys = keyset_slice(
+            self.store.author_posts.get(user_id, []), before, after, page_size
+        )
+
+        return build_page(list(map(self.user_post, keys)), before, after, page_size)
+
+    async def fetch_timeline(self, user_id, before=None, after=None, limit=None):
+        page_size = limit or settings.FEED_PAGE_SIZE
+        authors = self.store.following.get(user_id, set()) | {user_id}
+        keys = [
+            key
+            for author_id in authors
+            for key in keyset_slice(
+                self.store.author_posts.get(author_id, []), before, after, page_size
+            )
+        ]
+        if after:
+            keys = heapq.nsmallest(page_size + 1, keys)
+        else:
+            keys = heapq.nlargest(page_size + 1, keys)
+
+        return build_page(list(map(self.post_summary, keys)), before, after, page_size)
+
+
+memory_store = MemoryStore()
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import Integer, delete, func, insert, literal, select, update
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.db import async_session
+from app.db.models import OutboxJob, Post
+from app.repositories.timeline import fan_out_query, recent_posts
+
+logger = logging.getLogger("app.outbox")
+
+outbox_jobs = registry.counter(
+    "outbox_jobs_total",
+    "Outbox jobs processed, by kind and outcome.",
+    labels=("kind", "outcome"),
+)
+
+
+def enqueue_query(kind: str, payloads):
+    return insert(OutboxJob).from_select(
+        ["kind", "payload"],
+        select(literal(kind), payloads),
+    )
+
+
+def post_published_query(posts):
+    return enqueue_query(
+        "post_published",
+        func.jsonb_build_object(
+            "post_id", posts.c.id, "created_at", posts.c.created_at
+        ),
+    )
+
+
+def author_fanned_out_query(author_id: int):
+    return enqueue_query(
+        "author_fanned_out",
+        func.jsonb_build_object("author_id", literal(author_id, Integer)),
+    )
+
+
+async def fan_out_post(db, payload: dict) -> None:
+    posts = select(Post.id, Post.author_id, Post.created_at).where(
+        Post.id == payload["post_id"]
+    )
+    if "created_at" in payload:
+        posts = posts.where(
+            Post.created_at == datetime.fromisoformat(payload["created_at"])
+        )
+    await db.execute(fan_out_query(posts.subquery()))
+
+
+async def backfill_followers(db, payload: dict) -> None:
+    await db.execute(fan_out_query(recent_posts(payload["author_id"])))
+
+
+HANDLERS = {
+    "post_published": fan_out_post,
+    "author_fanned_out": backfill_followers,
+}
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        session_factory,
+        batch_size: int,
+        poll_interval: float,
+        max_attempts: int,
+        retry_base: float,
+        retry_max: float,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.depth = 0
+        self.dead = 0
+        self.lag = 0.0
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is None:
+            return
+
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    def notify(self) -> None:
+        self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.run_once()
+                if processed < self.batch_size:
+                    await self.refresh_stats()
+            except Exception:
+                logger.exception("outbox poll failed")
+                processed = 0
+
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(
+            seconds=min(self.retry_base * 2**attempts, self.retry_max)
+        )
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as db:
+            jobs = (
+                await db.execute(
+                    select(
+                        OutboxJob.id,
+                        OutboxJob.kind,
+                        OutboxJob.payload,
+                        OutboxJob.attempts,
+                    )
+                    .where(
+                        OutboxJob.run_after <= func.now(),
+                        OutboxJob.attempts < self.max_attempts,
+                    )
+                    .order_by(OutboxJob.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+
+            done = []
+            for job in jobs:
+                handler = HANDLERS.get(job.kind)
+                try:
+                    if handler is None:
+                        raise LookupError(f"no handler for {job.kind!r}")
+                    async with db.begin_nested():
+                        await handler(db, job.payload)
+                except Exception as exc:
+                    logger.warning(
+                        "outbox job %d (%s) failed: %r", job.id, job.kind, exc
+                    )
+                    outbox_jobs.inc(job.kind, "failed")
+                    await db.execute(
+                        update(OutboxJob)
+                        .where(OutboxJob.id == job.id)
+                        .values(
+                            attempts=OutboxJob.attempts + 1,
+                            run_after=func.now() + self.backoff(job.attempts),
+                            last_error=repr(exc)[:1000],
+                        )
+                    )
+                else:
+                    outbox_jobs.inc(job.kind, "done")
+                    done.append(job.id)
+
+            if done:
+                await db.execute(delete(OutboxJob).where(OutboxJob.id.in_(done)))
+            await db.commit()
+
+        return len(jobs)
+
+    async def refresh_stats(self) -> None:
+        pending = OutboxJob.attempts < self.max_attempts
+        oldest = func.min(OutboxJob.created_at).filter(pending)
+        async with self.session_factory() as db:
+            row = (
+                await db.execute(
+                    select(
+                        func.count().filter(pending),
+                        func.count().filter(~pending),
+                        func.coalesce(func.extract("epoch", func.now() - oldest), 0),
+                    )
+                )
+            ).one()
+        self.depth, self.dead, self.lag = row[0], row[1], float(row[2])
+
+    async def drain(self) -> int:
+        total = 0
+        while processed := await self.run_once():
+            total += processed
+
+        return total
+
+
+outbox_worker = OutboxWorker(
+    async_session,
+    settings.OUTBOX_BATCH_SIZE,
+    settings.OUTBOX_POLL_INTERVAL,
+    settings.OUTBOX_MAX_ATTEMPTS,
+    settings.OUTBOX_RETRY_BASE,
+    settings.OUTBOX_RETRY_MAX,
+)
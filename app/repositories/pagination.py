@@ -0,0 +1,73 @@
+import base64
+import bisect
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+@dataclass
+class Page:
+    items: list = field(default_factory=list)
+    older: str | None = None
+    newer: str | None = None
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset(stmt, created_at_column, id_column, before, after, page_size):
+    key = tuple_(created_at_column, id_column)
+    if after:
+        cursor = decode_cursor(after)
+        stmt = stmt.where(created_at_column >= cursor[0], key > cursor).order_by(
+            created_at_column.asc(), id_column.asc()
+        )
+    else:
+        if before:
+            cursor = decode_cursor(before)
+            stmt = stmt.where(created_at_column <= cursor[0], key < cursor)
+        stmt = stmt.order_by(created_at_column.desc(), id_column.desc())
+
+    return stmt.limit(page_size + 1)
+
+
+def keyset_slice(keys, before, after, page_size):
+    if after:
+        start = bisect.bisect_right(keys, decode_cursor(after))
+        return keys[start : start + page_size + 1]
+
+    end = bisect.bisect_left(keys, decode_cursor(before)) if before else len(keys)
+
+    return keys[max(0, end - page_size - 1) : end][::-1]
+
+
+def build_page(rows, before, after, page_size) -> Page:
+    has_more = len(rows) > page_size
+    rows = list(rows[:page_size])
+    if after:
+        rows.reverse()
+
+    if not rows:
+        return Page(older=after, newer=before)
+
+    first = encode_cursor(rows[0].created_at, rows[0].id)
+    last = encode_cursor(rows[-1].created_at, rows[-1].id)
+    if after:
+        return Page(items=rows, older=last, newer=first if has_more else None)
+
+    return Page(
+        items=rows, older=last if has_more else None, newer=first if before else None
+    )
@@ -1,219 +1,631 @@
-import secrets
 from abc import ABC, abstractmethod
-from datetime import datetime
 
 from fastapi import HTTPException
-from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy import (
+    Integer,
+    and_,
+    delete,
+    exists,
+    func,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import page_cache
+from app.core.conditional import (
+    conditional_html,
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    validator_headers,
+)
+from app.core.config import settings
+from app.core.markup import MARKDOWN_VERSION, html_text, render_markdown
+from app.core.security import password_hasher
+from app.core.sessions import session_store
+from app.core.templating import listing_response, render_template, templates
+from app.db.db import async_session
+from app.db.models import (
+    SEARCH_CONFIG,
+    Follow,
+    Post,
+    TimelineEntry,
+    User,
+    make_excerpt,
+    post_locations,
+)
+from app.repositories.batching import post_batcher
+from app.repositories.outbox import (
+    author_fanned_out_query,
+    outbox_worker,
+    post_published_query,
+)
+from app.repositories.pagination import build_page, keyset
+from app.repositories.streaming import RowStream
+from app.repositories.timeline import backfill_query, fans_out, timeline_ids_query
+
+SEARCH_MIN_LENGTH = 3
+SEARCH_TRIGRAM_MAX_LENGTH = 4
+
+
+def post_summaries_query():
+    return select(
+        Post.id,
+        Post.author_id,
+        Post.title,
+        Post.excerpt,
+        Post.excerpt_has_more,
+        Post.created_at,
+        Post.updated_at,
+        User.username,
+    ).join(User)
+
+
+def user_posts_query(user_id):
+    return select(
+        Post.id,
+        Post.title,
+        Post.created_at,
+        Post.excerpt,
+        Post.excerpt_has_more,
+    ).where(Post.author_id == user_id)
+
+
+def locate_post(post_id):
+    created_at = (
+        select(post_locations.c.created_at)
+        .where(post_locations.c.post_id == post_id)
+        .scalar_subquery()
+    )
+
+    return and_(Post.id == post_id, Post.created_at == created_at)
+
+
+def users_query():
+    return select(
+        User.id,
+        User.username,
+        User.role,
+        User.created_at,
+        User.recent_post_at,
+        User.post_count,
+        User.follower_count,
+    ).order_by(
+        User.post_count.desc(),
+        User.recent_post_at.desc(),
+        User.created_at.desc(),
+        User.id.desc(),
+    )
+
+
+def new_post_values(author_id: int, title: str, body: str) -> dict:
+    body_html = render_markdown(body)
+    excerpt, excerpt_has_more = make_excerpt(html_text(body_html))
+
+    return {
+        "author_id": author_id,
+        "title": title,
+        "body": body,
+        "excerpt": excerpt,
+        "excerpt_has_more": excerpt_has_more,
+        "body_html": body_html,
+        "body_html_version": MARKDOWN_VERSION,
+    }
+
+
+def create_post_query(post: dict):
+    new_post = (
+        insert(Post)
+        .values(post)
+        .returning(Post.id, Post.author_id, Post.created_at)
+        .cte("new_post")
+    )
+    author = (
+        update(User)
+        .where(User.id == new_post.c.author_id)
+        .values(
+            recent_post_at=new_post.c.created_at, post_count=User.post_count + 1
+        )
+        .cte("author")
+    )
+
+    publish = post_published_query(new_post).cte("publish")
+
+    return select(new_post.c.id).add_cte(author).add_cte(publish)
 
-from app.db.models import User, Post
 
-templates = Jinja2Templates(directory="templates")
-sessions = {}  # in the future, replace with FastAPI-Users or another
+def pin_to_primary(response):
+    response.set_cookie(
+        key="primary_pin",
+        value="1",
+        max_age=settings.DB_PRIMARY_PIN_SECONDS,
+        httponly=True,
+    )
+
+    return response
 
 
 class BlogRepository(ABC):
-    @abstractmethod
     def render_signup_page(self, request):
-        pass
+        return templates.TemplateResponse("signup.html", {"request": request})
 
     @abstractmethod
     async def register_user(self, username, password):
         pass
 
-    @abstractmethod
     def render_login_page(self, request):
-        pass
+        return templates.TemplateResponse("login.html", {"request": request})
 
     @abstractmethod
     async def login_user(self, username, password):
         pass
 
+    async def get_all_blogs(self, request, session_id, before=None, after=None):
+        user = await session_store.get(session_id) or False
+        cache_key = (before, after, user)
+        cached = page_cache.get("feed", cache_key)
+        if cached is not None:
+            return conditional_html(request, *cached, private=bool(user))
+
+        page = await self.fetch_feed(before, after)
+        versions = [(post.id, post.updated_at) for post in page.items]
+        last_modified = max((updated_at for _, updated_at in versions), default=None)
+        etag = make_etag("feed", before, after, user, *versions)
+        headers = validator_headers(etag, last_modified, private=bool(user))
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(headers)
+
+        html = render_template(
+            "posts_all.html",
+            {
+                "request": request,
+                "user": user,
+                "posts": page.items,
+                "older": page.older,
+                "newer": page.newer,
+            },
+        )
+        page_cache.set("feed", cache_key, (html, etag, last_modified))
+
+        return HTMLResponse(html, headers=headers)
+
+    async def render_create_post_page(self, request, session_id):
+        if await session_store.get(session_id) is None:
+            return RedirectResponse(url="/api/login/", status_code=303)
+
+        return templates.TemplateResponse("post_create.html", {"request": request})
+
     @abstractmethod
-    async def get_all_blogs(self, request, session_id):
+    async def create_post(self, title, body, session_id):
         pass
 
+    async def get_blog(self, request, blog_id):
+        cached = page_cache.get("post", blog_id)
+        if cached is not None:
+            return conditional_html(request, *cached)
+
+        if is_conditional(request):
+            updated_at = await self.fetch_post_updated_at(blog_id)
+            if updated_at is None:
+                raise HTTPException(status_code=404, detail="Blog not found")
+
+            etag = make_etag("post", blog_id, updated_at)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified(validator_headers(etag, updated_at))
+
+        post = await self.fetch_post(blog_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Blog not found")
+
+        etag = make_etag("post", blog_id, post.updated_at)
+        headers = validator_headers(etag, post.updated_at)
+        html = render_template("post_page.html", {"request": request, "post": post})
+        page_cache.set(
+            "post",
+            blog_id,
+            (html, etag, post.updated_at),
+            ttl=settings.PAGE_CACHE_POST_TTL,
+        )
+
+        return HTMLResponse(html, headers=headers)
+
     @abstractmethod
-    def render_create_post_page(self, request, session_id):
+    async def get_all_users(self, request, page=1):
         pass
 
     @abstractmethod
-    async def create_post(self, title, body, session_id):
+    async def get_user(self, request, user_id, session_id):
         pass
 
     @abstractmethod
-    async def get_blog(self, request, blog_id):
+    async def search_posts(self, request, query, page=1):
         pass
 
     @abstractmethod
-    async def get_all_users(self, request):
+    async def follow_user(self, user_id, session_id):
         pass
 
     @abstractmethod
-    async def get_user(self, request, user_id, session_id):
+    async def unfollow_user(self, user_id, session_id):
+        pass
+
+    async def get_timeline(self, request, session_id, before=None, after=None):
+        user = await session_store.get(session_id)
+        if user is None:
+            return RedirectResponse(url="/api/login/", status_code=303)
+
+        page = await self.fetch_timeline(user, before, after)
+        html = render_template(
+            "timeline.html",
+            {
+                "request": request,
+                "user": user,
+                "posts": page.items,
+                "older": page.older,
+                "newer": page.newer,
+            },
+        )
+
+        return HTMLResponse(html, headers={"Cache-Control": "private, no-cache"})
+
+    @abstractmethod
+    async def fetch_feed(self, before=None, after=None, limit=None):
+        pass
+
+    @abstractmethod
+    async def fetch_post(self, post_id):
+        pass
+
+    @abstractmethod
+    async def fetch_post_updated_at(self, post_id):
+        pass
+
+    @abstractmethod
+    async def fetch_users(self, page=1, limit=None):
+        pass
+
+    @abstractmethod
+    async def fetch_user(self, user_id):
+        pass
+
+    @abstractmethod
+    async def fetch_user_posts(self, user_id, before=None, after=None, limit=None):
+        pass
+
+    @abstractmethod
+    async def fetch_timeline(self, user_id, before=None, after=None, limit=None):
         pass
 
 
 class SQLAlchemyBlogRepository(BlogRepository):
-    def __init__(self, database: AsyncSession):
+    def __init__(
+        self,
+        database: AsyncSession,
+        read_database: AsyncSession | None = None,
+        reader: async_sessionmaker = async_session,
+    ):
         self.db = database
-
-    def render_signup_page(self, request):
-        return templates.TemplateResponse("signup.html", {"request": request})
+        self.read_db = read_database or database
+        self.reader = reader
 
     async def register_user(self, username, password):
-        result = await self.db.execute(select(User).where(User.username == username))
-        user = result.scalars().first()
-        if user:
+        taken = await self.db.scalar(select(exists().where(User.username == username)))
+        await self.db.rollback()
+        user_id = None
+        if not taken:
+            user_id = await self.db.scalar(
+                insert(User)
+                .values(
+                    username=username, password=await password_hasher.hash(password)
+                )
+                .on_conflict_do_nothing(index_elements=[User.username])
+                .returning(User.id)
+            )
+        if user_id is None:
             raise HTTPException(status_code=400, detail="Username already exists")
 
-        new_user = User(username=username)
-        new_user.set_password(password)
-        self.db.add(new_user)
         await self.db.commit()
 
         return RedirectResponse(url="/api/login/", status_code=303)
 
-    def render_login_page(self, request):
-        return templates.TemplateResponse("login.html", {"request": request})
-
     async def login_user(self, username, password):
-        result = await self.db.execute(select(User).where(User.username == username))
-        user = result.scalars().first()
-        if not user or not user.verify_password(password):
+        result = await self.db.execute(
+            select(User.id, User.password).where(User.username == username)
+        )
+        user = result.first()
+        await self.db.rollback()
+        if not user:
             raise HTTPException(status_code=400, detail="Invalid username or password")
 
-        session_id = secrets.token_hex(16)
-        sessions[session_id] = user.id
+        verified, new_hash = await password_hasher.verify_and_update(
+            password, user.password
+        )
+        if not verified:
+            raise HTTPException(status_code=400, detail="Invalid username or password")
+
+        if new_hash:
+            await self.db.execute(
+                update(User).where(User.id == user.id).values(password=new_hash)
+            )
+            await self.db.commit()
+
+        session_id = await session_store.create(user.id)
 
         response = RedirectResponse(url="/api/blog", status_code=303)
         response.set_cookie(key="session_id", value=session_id, httponly=True)
 
         return response
 
-    async def get_all_blogs(self, request, session_id):
-        if session_id not in sessions:
-            user = False
+    async def create_post(self, title, body, session_id):
+        user_id = await session_store.get(session_id)
+        if user_id is None:
+            return RedirectResponse(url="/api/login/", status_code=303)
+
+        post = new_post_values(user_id, title, body)
+        if settings.POST_GROUP_COMMIT:
+            post_id = await post_batcher.submit(post)
         else:
-            user = sessions[session_id]
+            post_id = await self.db.scalar(create_post_query(post))
+            await self.db.commit()
+        outbox_worker.notify()
+        page_cache.invalidate("feed")
 
-        result = await self.db.execute(
-            select(
-                Post.id,
-                Post.author_id,
-                Post.title,
-                Post.body,
-                Post.created_at,
-                User.username,
+        return pin_to_primary(
+            RedirectResponse(url=f"/api/blog/{post_id}/", status_code=303)
+        )
+
+    async def get_all_users(self, request, page=1):
+        page_size = settings.USERS_PAGE_SIZE
+        users = RowStream(
+            self.reader,
+            users_query().offset((page - 1) * page_size),
+            limit=page_size,
+        )
+
+        return await listing_response(
+            "users_all.html", {"request": request, "users": users, "page": page}
+        )
+
+    async def get_user(self, request, user_id, session_id):
+        viewer = await session_store.get(session_id)
+        owner = viewer == user_id
+
+        user = await self.fetch_user(user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        following = None
+        if viewer is not None and not owner:
+            following = await self.read_db.scalar(
+                select(
+                    exists().where(
+                        Follow.follower_id == viewer, Follow.followee_id == user_id
+                    )
+                )
             )
-            .join(User)
-            .order_by(Post.created_at.desc())
+
+        etag = make_etag("user", user_id, user.updated_at, owner, following)
+        headers = validator_headers(etag, user.updated_at, private=True)
+        if is_not_modified(request, etag, user.updated_at):
+            return not_modified(headers)
+
+        posts = RowStream(
+            self.reader,
+            user_posts_query(user_id).order_by(
+                Post.created_at.desc(), Post.id.desc()
+            ),
         )
-        posts = result.all()
+
+        return await listing_response(
+            "user_profile.html",
+            {
+                "request": request,
+                "user": user,
+                "owner": owner,
+                "following": following,
+                "posts": posts,
+            },
+            headers=headers,
+        )
+
+    async def search_posts(self, request, query, page=1):
+        query = query.strip()
+        page_size = settings.SEARCH_PAGE_SIZE
+        posts = []
+        if len(query) >= SEARCH_MIN_LENGTH:
+            stmt = post_summaries_query()
+            if len(query) <= SEARCH_TRIGRAM_MAX_LENGTH and " " not in query:
+                stmt = stmt.where(
+                    Post.title.icontains(query, autoescape=True)
+                ).order_by(func.similarity(Post.title, query).desc(), Post.id.desc())
+            else:
+                tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+                rank = func.ts_rank_cd(Post.search_vector, tsquery)
+                stmt = stmt.where(Post.search_vector.op("@@")(tsquery)).order_by(
+                    rank.desc(), Post.id.desc()
+                )
+
+            result = await self.read_db.execute(
+                stmt.offset((page - 1) * page_size).limit(page_size + 1)
+            )
+            posts = result.all()
 
         return templates.TemplateResponse(
-            "posts_all.html", {"request": request, "user": user, "posts": posts}
+            "search_results.html",
+            {
+                "request": request,
+                "query": query,
+                "posts": posts[:page_size],
+                "page": page,
+                "has_next": len(posts) > page_size,
+            },
         )
 
-    def render_create_post_page(self, request, session_id):
-        if session_id not in sessions:
+    async def follow_user(self, user_id, session_id):
+        follower_id = await session_store.get(session_id)
+        if follower_id is None:
             return RedirectResponse(url="/api/login/", status_code=303)
 
-        return templates.TemplateResponse("post_create.html", {"request": request})
+        if follower_id != user_id:
+            followed = await self.db.scalar(
+                insert(Follow)
+                .from_select(
+                    ["follower_id", "followee_id"],
+                    select(literal(follower_id, Integer), User.id).where(
+                        User.id == user_id
+                    ),
+                )
+                .on_conflict_do_nothing()
+                .returning(Follow.id)
+            )
+            if followed is not None:
+                follower_count = await self.db.scalar(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(follower_count=User.follower_count + 1)
+                    .returning(User.follower_count)
+                )
+                if fans_out(follower_count):
+                    await self.db.execute(backfill_query(follower_id, user_id))
+                await self.db.commit()
+
+        return pin_to_primary(
+            RedirectResponse(url=f"/api/users/{user_id}/", status_code=303)
+        )
 
-    async def create_post(self, title, body, session_id):
-        user_id = sessions[session_id]
-        new_post = Post(
-            author_id=user_id,
-            title=title,
-            body=body,
+    async def unfollow_user(self, user_id, session_id):
+        follower_id = await session_store.get(session_id)
+        if follower_id is None:
+            return RedirectResponse(url="/api/login/", status_code=303)
+
+        unfollowed = await self.db.scalar(
+            delete(Follow)
+            .where(Follow.follower_id == follower_id, Follow.followee_id == user_id)
+            .returning(Follow.id)
         )
-        self.db.add(new_post)
+        if unfollowed is not None:
+            follower_count = await self.db.scalar(
+                update(User)
+                .where(User.id == user_id)
+                .values(follower_count=User.follower_count - 1)
+                .returning(User.follower_count)
+            )
+            if fans_out(follower_count) and not fans_out(follower_count + 1):
+                await self.db.execute(author_fanned_out_query(user_id))
+            await self.db.execute(
+                delete(TimelineEntry).where(
+                    TimelineEntry.user_id == follower_id,
+                    TimelineEntry.author_id == user_id,
+                )
+            )
+            await self.db.commit()
+            outbox_worker.notify()
 
-        user = await self.db.scalar(select(User).where(User.id == user_id))
-        user.recent_post_at = datetime.now()
+        return pin_to_primary(
+            RedirectResponse(url=f"/api/users/{user_id}/", status_code=303)
+        )
 
-        await self.db.commit()
-        await self.db.refresh(new_post)
+    async def fetch_feed(self, before=None, after=None, limit=None):
+        page_size = limit or settings.FEED_PAGE_SIZE
+        result = await self.read_db.execute(
+            keyset(
+                post_summaries_query(),
+                Post.created_at,
+                Post.id,
+                before,
+                after,
+                page_size,
+            )
+        )
 
-        return RedirectResponse(url=f"/api/blog/{new_post.id}/", status_code=303)
+        return build_page(result.all(), before, after, page_size)
 
-    async def get_blog(self, request, blog_id):
-        result = await self.db.execute(
+    async def fetch_post(self, post_id):
+        result = await self.read_db.execute(
             select(
                 Post.id,
                 Post.author_id,
                 Post.title,
                 Post.body,
+                Post.body_html,
                 Post.created_at,
+                Post.updated_at,
                 User.username,
             )
             .join(User)
-            .where(Post.id == blog_id)
+            .where(locate_post(post_id))
         )
-        post = result.first()
 
-        if not post:
-            raise HTTPException(status_code=404, detail="Blog not found")
+        return result.first()
 
-        return templates.TemplateResponse(
-            "post_page.html", {"request": request, "post": post}
+    async def fetch_post_updated_at(self, post_id):
+        return await self.read_db.scalar(
+            select(Post.updated_at).where(locate_post(post_id))
         )
 
-    async def get_all_users(self, request):
-        result = await self.db.execute(
+    async def fetch_users(self, page=1, limit=None):
+        page_size = limit or settings.USERS_PAGE_SIZE
+        result = await self.read_db.execute(
+            users_query().offset((page - 1) * page_size).limit(page_size + 1)
+        )
+        users = result.all()
+
+        return users[:page_size], len(users) > page_size
+
+    async def fetch_user(self, user_id):
+        result = await self.read_db.execute(
             select(
                 User.id,
                 User.username,
                 User.role,
                 User.created_at,
+                User.updated_at,
                 User.recent_post_at,
-                func.count(Post.id).label("post_count"),
-            )
-            .join(Post, isouter=True)
-            .group_by(
-                User.id, User.username, User.role, User.created_at, User.recent_post_at
-            )
-            .order_by(
-                func.count(Post.id).label("post_count").desc(),
-                User.recent_post_at.desc(),
-                User.created_at.desc(),
-            )
-        )
-        users = result.all()
-
-        return templates.TemplateResponse(
-            "users_all.html", {"request": request, "users": users}
+                User.post_count,
+                User.follower_count,
+            ).where(User.id == user_id)
         )
 
-    async def get_user(self, request, user_id, session_id):
-        if session_id not in sessions:
-            owner = False
-        else:
-            owner = sessions[session_id] == user_id
+        return result.first()
 
-        result_user = await self.db.execute(
-            select(User.username, User.created_at).where(User.id == user_id)
+    async def fetch_user_posts(self, user_id, before=None, after=None, limit=None):
+        page_size = limit or settings.FEED_PAGE_SIZE
+        result = await self.read_db.execute(
+            keyset(
+                user_posts_query(user_id),
+                Post.created_at,
+                Post.id,
+                before,
+                after,
+                page_size,
+            )
         )
-        user = result_user.first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
 
-        result_posts = await self.db.execute(
-            select(Post.id, Post.title, Post.created_at, Post.body)
-            .where(Post.author_id == user_id)
-            .order_by(Post.created_at.desc())
+        return build_page(result.all(), before, after, page_size)
+
+    async def fetch_timeline(self, user_id, before=None, after=None, limit=None):
+        page_size = limit or settings.FEED_PAGE_SIZE
+        timeline = timeline_ids_query(user_id, before, after, page_size)
+        result = await self.read_db.execute(
+            keyset(
+                post_summaries_query().join(
+                    timeline,
+                    and_(
+                        timeline.c.id == Post.id,
+                        timeline.c.created_at == Post.created_at,
+                    ),
+                ),
+                Post.created_at,
+                Post.id,
+                before,
+                after,
+                page_size,
+            )
         )
-        posts = result_posts.all()
 
-        return templates.TemplateResponse(
-            "user_profile.html",
-            {
-                "request": request,
-                "user": user,
-                "owner": owner,
-                "posts": posts,
-            },
-        )
+        return build_page(result.all(), before, after, page_size)
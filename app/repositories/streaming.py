@@ -0,0 +1,27 @@
+from app.core.config import settings
+
+
+class RowStream:
+    def __init__(self, session_factory, stmt, limit: int | None = None):
+        self.session_factory = session_factory
+        self.stmt = stmt
+        self.limit = limit
+        self.has_more = False
+
+    async def __aiter__(self):
+        stmt = self.stmt
+        if self.limit is not None:
+            stmt = stmt.limit(self.limit + 1)
+
+        async with self.session_factory() as db:
+            result = await db.stream(
+                stmt.execution_options(yield_per=settings.STREAM_CHUNK_SIZE)
+            )
+            count = 0
+            async for row in result:
+                if count == self.limit:
+                    self.has_more = True
+                    break
+
+                count += 1
+                yield row
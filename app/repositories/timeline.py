@@ -0,0 +1,84 @@
+from sqlalchemy import Integer, literal, select, true, union, union_all
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.db.models import Follow, Post, TimelineEntry, User
+from app.repositories.pagination import keyset
+
+TIMELINE_COLUMNS = ["user_id", "post_id", "author_id", "post_created_at"]
+TIMELINE_KEY = ["user_id", "post_id"]
+
+
+def fans_out(follower_count):
+    return follower_count < settings.TIMELINE_FAN_OUT_MAX_FOLLOWERS
+
+
+def fan_out_query(posts):
+    return insert(TimelineEntry).from_select(
+        TIMELINE_COLUMNS,
+        select(Follow.follower_id, posts.c.id, posts.c.author_id, posts.c.created_at)
+        .join_from(posts, Follow, Follow.followee_id == posts.c.author_id)
+        .join(User, User.id == posts.c.author_id)
+        .where(fans_out(User.follower_count)),
+    ).on_conflict_do_nothing(index_elements=TIMELINE_KEY)
+
+
+def recent_posts(author_id: int):
+    return (
+        select(Post.id, Post.author_id, Post.created_at)
+        .where(Post.author_id == author_id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(settings.TIMELINE_BACKFILL)
+        .subquery()
+    )
+
+
+def backfill_query(follower_id: int, followee_id: int):
+    recent = recent_posts(followee_id)
+
+    return insert(TimelineEntry).from_select(
+        TIMELINE_COLUMNS,
+        select(
+            literal(follower_id, Integer),
+            recent.c.id,
+            recent.c.author_id,
+            recent.c.created_at,
+        ),
+    ).on_conflict_do_nothing(index_elements=TIMELINE_KEY)
+
+
+def timeline_ids_query(user_id: int, before, after, page_size: int):
+    fanned_out = keyset(
+        select(
+            TimelineEntry.post_id.label("id"),
+            TimelineEntry.post_created_at.label("created_at"),
+        ).where(TimelineEntry.user_id == user_id),
+        TimelineEntry.post_created_at,
+        TimelineEntry.post_id,
+        before,
+        after,
+        page_size,
+    )
+
+    authors = union_all(
+        select(Follow.followee_id.label("author_id"))
+        .join(User, User.id == Follow.followee_id)
+        .where(
+            Follow.follower_id == user_id,
+            ~fans_out(User.follower_count),
+        ),
+        select(literal(user_id, Integer).label("author_id")),
+    ).subquery("authors")
+    recent = keyset(
+        select(Post.id, Post.created_at).where(Post.author_id == authors.c.author_id),
+        Post.created_at,
+        Post.id,
+        before,
+        after,
+        page_size,
+    ).lateral("recent")
+    fanned_in = select(recent.c.id, recent.c.created_at).select_from(
+        authors.join(recent, true())
+    )
+
+    return union(fanned_out, fanned_in).subquery("timeline")
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import summarize
+
+from sqlalchemy import func, select
+
+from app.db.db import async_engine, async_session
+from app.db.models import Post, User
+from app.repositories.batching import PostBatcher
+from app.repositories.repository import create_post_query, new_post_values
+
+BODY = "Benchmark body. " * 40
+
+
+def make_post(author_id: int) -> dict:
+    return new_post_values(author_id, "Benchmark post", BODY)
+
+
+async def create_round_trips(post: dict) -> int:
+    async with async_session() as db:
+        new_post = Post(**post)
+        db.add(new_post)
+        user = await db.get(User, post["author_id"])
+        user.recent_post_at = func.now()
+        user.post_count = User.post_count + 1
+        await db.commit()
+        await db.refresh(new_post)
+
+        return new_post.id
+
+
+async def create_cte(post: dict) -> int:
+    async with async_session() as db:
+        post_id = await db.scalar(create_post_query(post))
+        await db.commit()
+
+        return post_id
+
+
+async def run(create, author_ids: list[int], posts: int, concurrency: int) -> dict:
+    samples = []
+    queue = asyncio.Queue()
+    for index in range(posts):
+        queue.put_nowait(author_ids[index % len(author_ids)])
+
+    async def worker():
+        while not queue.empty():
+            post = make_post(queue.get_nowait())
+            started = time.perf_counter()
+            await create(post)
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {**summarize(samples), "posts_per_sec": round(posts / elapsed, 1)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput of create_post write paths against a seeded database"
+    )
+    parser.add_argument("--posts", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--authors", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    async with async_session() as db:
+        author_ids = list(
+            await db.scalars(select(User.id).order_by(User.id).limit(args.authors))
+        )
+    if not author_ids:
+        raise SystemExit("No users found, run benchmarks.seed first")
+
+    batcher = PostBatcher(async_session, args.batch, args.window_ms / 1000)
+    for name, create in (
+        ("round_trips", create_round_trips),
+        ("cte", create_cte),
+        ("group_commit", batcher.submit),
+    ):
+        result = await run(create, author_ids, args.posts, args.concurrency)
+        print(f"{name:>12}: {result}")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
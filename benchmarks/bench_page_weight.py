@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import re
+
+import benchmarks.common  # noqa
+
+import httpx
+
+PAGES = (
+    "/api/blog/",
+    "/api/blog/1/",
+    "/api/users/",
+    "/api/users/1/",
+    "/api/search/?q=python",
+    "/api/login/",
+    "/api/v1/posts/",
+    "/api/v1/users/",
+)
+ENCODINGS = ("identity", "gzip", "br")
+STYLESHEET = re.compile(rb'<link rel="stylesheet" href="([^"]+)"')
+
+
+async def wire_size(client, path: str, encoding: str) -> tuple[int, bytes, str]:
+    async with client.stream(
+        "GET", path, headers={"Accept-Encoding": encoding}
+    ) as response:
+        raw = b""
+        async for chunk in response.aiter_raw():
+            raw += chunk
+
+        return len(raw), raw, response.headers.get("content-encoding", "identity")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bytes on the wire per page")
+    parser.add_argument(
+        "--base-url", help="measure a running server instead of an in-process app"
+    )
+    args = parser.parse_args()
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url)
+    else:
+        from main import app
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+        )
+
+    stylesheets = set()
+    async with client:
+        print(f"{'page':<24}" + "".join(f"{encoding:>12}" for encoding in ENCODINGS))
+        for path in PAGES:
+            sizes = []
+            for encoding in ENCODINGS:
+                size, raw, used = await wire_size(client, path, encoding)
+                sizes.append(f"{size:>8} {used[:3]:<3}")
+                if encoding == "identity":
+                    stylesheets.update(STYLESHEET.findall(raw))
+            print(f"{path:<24}" + "".join(f"{size:>12}" for size in sizes))
+
+        for url in sorted(stylesheets):
+            sizes = []
+            for encoding in ENCODINGS:
+                size, _, used = await wire_size(client, url.decode(), encoding)
+                sizes.append(f"{size:>8} {used[:3]:<3}")
+            print(
+                f"{url.decode().split('?')[0]:<24}"
+                + "".join(f"{size:>12}" for size in sizes)
+                + "  (once per client, then cached)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
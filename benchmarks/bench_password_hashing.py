@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import summarize
+
+from app.core.security import password_hasher, pwd_context
+
+
+async def feed_requests(stop: asyncio.Event, interval: float, samples: list[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def login_inline(password: str, hashed: str):
+    pwd_context.verify(password, hashed)
+
+
+async def login_offloaded(password: str, hashed: str):
+    await password_hasher.verify_and_update(password, hashed)
+
+
+async def run(login, logins: int, concurrency: int, interval: float) -> dict:
+    hashed = pwd_context.hash("benchmark")
+    samples = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(feed_requests(stop, interval, samples))
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            await login("benchmark", hashed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    return {**summarize(samples), "logins_per_sec": round(logins / elapsed, 1)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Event-loop stall seen by feed requests during concurrent logins"
+    )
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    interval = args.interval_ms / 1000
+    for name, login in (("inline", login_inline), ("offloaded", login_offloaded)):
+        result = await run(login, args.logins, args.concurrency, interval)
+        print(f"{name:>10}: feed delay {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import BENCH_PASSWORD, BENCH_USERNAME_PREFIX
+
+import httpx
+
+PATHS = ("/api/login/", "/api/blog/", "/api/users/", "/api/blog/1/")
+
+
+async def child():
+    started = time.perf_counter()
+    from main import app
+
+    imported = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            first = {}
+            for path in PATHS:
+                request_started = time.perf_counter()
+                await client.get(path)
+                first[path] = time.perf_counter() - request_started
+
+            request_started = time.perf_counter()
+            await client.post(
+                "/api/login/",
+                data={
+                    "username": f"{BENCH_USERNAME_PREFIX}0",
+                    "password": BENCH_PASSWORD,
+                },
+            )
+            first["login"] = time.perf_counter() - request_started
+
+    print(
+        json.dumps(
+            {
+                "import": imported - started,
+                "startup": ready - imported,
+                **first,
+            }
+        )
+    )
+
+
+def run_child(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env={**os.environ, **env},
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Startup time and first-request latency of a fresh worker"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child())
+        return
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        modes = {
+            "lazy": {"DB_WARMUP_CONNECTIONS": "0", "TEMPLATE_CACHE_DIR": ""},
+            "warmed": {"TEMPLATE_CACHE_DIR": cache_dir},
+        }
+        run_child(modes["warmed"])
+        for name, env in modes.items():
+            runs = [run_child(env) for _ in range(args.runs)]
+            result = {
+                key: round(statistics.median(run[key] for run in runs) * 1000, 1)
+                for key in runs[0]
+            }
+            print(f"{name:>7} (median ms): {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import summarize
+
+from sqlalchemy import delete, func, insert, select, text, update
+
+from app.core.config import settings
+from app.db.db import async_engine, async_session
+from app.db.models import Follow, Post, TimelineEntry, User
+from app.repositories.outbox import outbox_worker
+from app.repositories.repository import (
+    SQLAlchemyBlogRepository,
+    create_post_query,
+    new_post_values,
+)
+from cli import recompute_user_stats
+
+STRATEGIES = {"fan_out": 10**9, "fan_in": 0}
+
+BACKFILL_ALL = text(
+    """
+    INSERT INTO timeline_entries (user_id, post_id, author_id, post_created_at)
+    SELECT follows.follower_id, recent.id, recent.author_id, recent.created_at
+    FROM follows
+    CROSS JOIN LATERAL (
+        SELECT id, author_id, created_at FROM posts
+        WHERE posts.author_id = follows.followee_id
+        ORDER BY created_at DESC, id DESC
+        LIMIT :backfill
+    ) AS recent
+    WHERE follows.follower_id = ANY(:readers)
+    """
+)
+
+
+async def recount_followers(db) -> None:
+    counts = (
+        select(Follow.followee_id, func.count().label("follower_count"))
+        .group_by(Follow.followee_id)
+        .subquery()
+    )
+    await db.execute(update(User).values(follower_count=0))
+    await db.execute(
+        update(User)
+        .where(User.id == counts.c.followee_id)
+        .values(follower_count=counts.c.follower_count)
+    )
+
+
+async def reset(readers: list[int]) -> None:
+    async with async_session() as db:
+        await db.execute(
+            delete(TimelineEntry).where(TimelineEntry.user_id.in_(readers))
+        )
+        await db.execute(delete(Follow).where(Follow.follower_id.in_(readers)))
+        await recount_followers(db)
+        await db.commit()
+
+
+async def run_concurrently(calls, concurrency: int) -> dict:
+    samples = []
+    queue = asyncio.Queue()
+    for call in calls:
+        queue.put_nowait(call)
+
+    async def worker():
+        while not queue.empty():
+            call = queue.get_nowait()
+            started = time.perf_counter()
+            await call()
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {**summarize(samples), "per_sec": round(len(samples) / elapsed, 1)}
+
+
+async def publish(author_id: int) -> None:
+    body = "Timeline benchmark. " * 20
+    async with async_session() as db:
+        await db.scalar(
+            create_post_query(new_post_values(author_id, "Timeline benchmark", body))
+        )
+        await db.commit()
+
+
+async def read_timeline(user_id: int) -> None:
+    async with async_session() as db:
+        await SQLAlchemyBlogRepository(db).fetch_timeline(user_id)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Timeline writes and reads with fan-out and fan-in strategies"
+    )
+    parser.add_argument("--readers", type=int, default=200)
+    parser.add_argument("--follows", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=1_000)
+    parser.add_argument("--reads", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    async with async_session() as db:
+        user_ids = list(await db.scalars(select(User.id).order_by(User.id)))
+    if len(user_ids) <= args.readers + args.follows:
+        raise SystemExit("Not enough users, run benchmarks.seed first")
+
+    rng.shuffle(user_ids)
+    readers = user_ids[: args.readers]
+    authors = user_ids[args.readers :]
+    follows = {reader: rng.sample(authors, args.follows) for reader in readers}
+    followed = sorted({author for chosen in follows.values() for author in chosen})
+
+    await reset(readers)
+    async with async_session() as db:
+        await db.execute(
+            insert(Follow),
+            [
+                {"follower_id": reader, "followee_id": author}
+                for reader, chosen in follows.items()
+                for author in chosen
+            ],
+        )
+        await recount_followers(db)
+        await db.commit()
+
+    try:
+        for name, threshold in STRATEGIES.items():
+            settings.TIMELINE_FAN_OUT_MAX_FOLLOWERS = threshold
+            async with async_session() as db:
+                await db.execute(
+                    delete(TimelineEntry).where(TimelineEntry.user_id.in_(readers))
+                )
+                if name == "fan_out":
+                    await db.execute(
+                        BACKFILL_ALL,
+                        {"backfill": settings.TIMELINE_BACKFILL, "readers": readers},
+                    )
+                await db.commit()
+
+            writes = await run_concurrently(
+                [
+                    lambda author=rng.choice(followed): publish(author)
+                    for _ in range(args.posts)
+                ],
+                args.concurrency,
+            )
+            started = time.perf_counter()
+            drained = await outbox_worker.drain()
+            drain = round(time.perf_counter() - started, 3)
+            reads = await run_concurrently(
+                [
+                    lambda reader=rng.choice(readers): read_timeline(reader)
+                    for _ in range(args.reads)
+                ],
+                args.concurrency,
+            )
+            print(f"{name:>8} writes: {writes}")
+            print(f"{name:>8}  drain: {drained} jobs in {drain}s")
+            print(f"{name:>8}  reads: {reads}")
+    finally:
+        await reset(readers)
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(Post).where(Post.title == "Timeline benchmark"))
+            await recompute_user_stats(conn)
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
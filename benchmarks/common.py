@@ -0,0 +1,36 @@
+import math
+import os
+
+for name, value in {
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "postgres",
+    "DB_PASS": "postgres",
+    "DB_NAME": "blog_bench",
+    "RATE_LIMIT_AUTH_PER_MINUTE": "0",
+    "RATE_LIMIT_POST_PER_MINUTE": "0",
+}.items():
+    os.environ.setdefault(name, value)
+
+BENCH_USERNAME_PREFIX = "bench"
+BENCH_PASSWORD = "benchmark"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples, default=0.0) * 1000, 3),
+    }
@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.common import BENCH_PASSWORD, BENCH_USERNAME_PREFIX, summarize
+from benchmarks.seed import make_posts
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.core.templating import render_template
+from app.db.db import async_session
+from app.db.models import Post, User
+from app.repositories.memory import InMemoryBlogRepository, memory_store
+from app.repositories.repository import SQLAlchemyBlogRepository
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+class Context:
+    def __init__(self, max_user_id: int, max_post_id: int, rng: random.Random):
+        self.max_user_id = max_user_id
+        self.max_post_id = max_post_id
+        self.rng = rng
+
+    def username(self) -> str:
+        return f"{BENCH_USERNAME_PREFIX}{self.rng.randrange(self.max_user_id)}"
+
+
+async def feed(client, ctx):
+    return await client.get("/api/blog/")
+
+
+async def post_page(client, ctx):
+    return await client.get(f"/api/blog/{ctx.rng.randint(1, ctx.max_post_id)}/")
+
+
+async def users_list(client, ctx):
+    return await client.get(f"/api/users/?page={ctx.rng.randint(1, 10)}")
+
+
+async def profile(client, ctx):
+    return await client.get(f"/api/users/{ctx.rng.randint(1, ctx.max_user_id)}/")
+
+
+async def login(client, ctx):
+    return await client.post(
+        "/api/login/", data={"username": ctx.username(), "password": BENCH_PASSWORD}
+    )
+
+
+async def create(client, ctx):
+    return await client.post(
+        "/api/blog/create/",
+        data={"title": "Benchmark post", "body": "Benchmark body. " * 40},
+    )
+
+
+HTTP_SCENARIOS = {
+    "feed": (feed, 1.0),
+    "post_page": (post_page, 1.0),
+    "users_list": (users_list, 1.0),
+    "profile": (profile, 1.0),
+    "login": (login, 0.1),
+    "create": (create, 0.5),
+}
+
+
+async def drive(make_client, scenario, ctx, requests: int, concurrency: int) -> dict:
+    samples = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        async with make_client() as client:
+            if scenario is create:
+                await login(client, ctx)
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await scenario(client, ctx)
+                samples.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        **summarize(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1),
+    }
+
+
+async def time_calls(call, requests: int) -> dict:
+    samples = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        call_started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    return {**summarize(samples), "throughput_rps": round(len(samples) / elapsed, 1)}
+
+
+def fill_memory_store(users: int, posts: int, seed_value: int) -> Context:
+    rng = random.Random(seed_value)
+    password = pwd_context.hash(BENCH_PASSWORD)
+    now = datetime.now()
+    user_ids = [
+        memory_store.add_user(
+            f"{BENCH_USERNAME_PREFIX}{i}",
+            password,
+            created_at=now - timedelta(days=rng.randint(30, 730)),
+        ).id
+        for i in range(users)
+    ]
+    rng.shuffle(user_ids)
+    memory_store.load_posts(make_posts(rng, user_ids, posts, now))
+
+    return Context(
+        max_user_id=len(memory_store.users),
+        max_post_id=len(memory_store.posts),
+        rng=random.Random(seed_value),
+    )
+
+
+async def repository_scenarios(ctx, requests: int, repo) -> dict:
+    results = {}
+    queries = {
+        "query:feed": lambda: repo.fetch_feed(),
+        "query:post": lambda: repo.fetch_post(ctx.rng.randint(1, ctx.max_post_id)),
+        "query:users": lambda: repo.fetch_users(ctx.rng.randint(1, 10)),
+        "query:user_posts": lambda: repo.fetch_user_posts(
+            ctx.rng.randint(1, ctx.max_user_id)
+        ),
+    }
+    for name, call in queries.items():
+        results[name] = await time_calls(call, requests)
+
+    page = await repo.fetch_feed()
+    post = await repo.fetch_post(page.items[0].id) if page.items else None
+
+    async def render_feed():
+        render_template(
+            "posts_all.html",
+            {"user": False, "posts": page.items, "older": None, "newer": None},
+        )
+
+    async def render_post():
+        render_template("post_page.html", {"post": post})
+
+    results["render:feed"] = await time_calls(render_feed, requests)
+    if post:
+        results["render:post"] = await time_calls(render_post, requests)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, expected in baseline.items():
+        actual = results.get(name)
+        if actual is None:
+            continue
+
+        if actual["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {actual['p95_ms']}ms > baseline {expected['p95_ms']}ms"
+            )
+        if actual["throughput_rps"] < expected["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {actual['throughput_rps']} rps "
+                f"< baseline {expected['throughput_rps']} rps"
+            )
+
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark every blog endpoint")
+    parser.add_argument(
+        "--base-url", help="running server to test; the app runs in-process if omitted"
+    )
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--scenarios",
+        default=",".join([*HTTP_SCENARIOS, "repository"]),
+        help="comma-separated subset of scenarios",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="serve from InMemoryBlogRepository to measure everything but the DB",
+    )
+    parser.add_argument("--memory-users", type=int, default=10_000)
+    parser.add_argument("--memory-posts", type=int, default=200_000)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.memory and args.base_url:
+        parser.error("--memory runs the app in-process, drop --base-url")
+    if args.memory:
+        settings.REPOSITORY_BACKEND = "memory"
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://testserver"
+
+    def make_client():
+        return httpx.AsyncClient(
+            base_url=base_url, transport=transport, follow_redirects=False
+        )
+
+    if args.memory:
+        ctx = fill_memory_store(args.memory_users, args.memory_posts, args.seed)
+    else:
+        async with async_session() as db:
+            ctx = Context(
+                max_user_id=await db.scalar(select(func.max(User.id))) or 1,
+                max_post_id=await db.scalar(select(func.max(Post.id))) or 1,
+                rng=random.Random(args.seed),
+            )
+
+    results = {}
+    for name in args.scenarios.split(","):
+        if name == "repository":
+            if args.memory:
+                repo = InMemoryBlogRepository(memory_store)
+                results.update(await repository_scenarios(ctx, args.requests, repo))
+            else:
+                async with async_session() as db:
+                    repo = SQLAlchemyBlogRepository(db)
+                    results.update(
+                        await repository_scenarios(ctx, args.requests, repo)
+                    )
+            continue
+
+        scenario, weight = HTTP_SCENARIOS[name]
+        requests = max(1, int(args.requests * weight))
+        results[name] = await drive(
+            make_client, scenario, ctx, requests, args.concurrency
+        )
+
+    for name, result in results.items():
+        print(
+            f"{name:>18}: {result['throughput_rps']:>8} rps  "
+            f"p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  "
+            f"p99 {result['p99_ms']:>8}ms  errors {result.get('errors', 0)}"
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        regressions = compare(
+            results, json.loads(BASELINE_PATH.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import BENCH_PASSWORD, BENCH_USERNAME_PREFIX
+
+from sqlalchemy import insert, select, text
+
+from app.core.security import pwd_context
+from app.db.db import async_engine
+from app.db.models import Post, User
+from app.db.partitions import ensure_partitions
+from app.repositories.repository import new_post_values
+from cli import recompute_user_stats
+
+WORDS = (
+    "блог пост запись автор читатель неделя город утро вечер проект код база "
+    "данных запрос индекс страница лента сервер клиент ответ время память "
+    "python fastapi postgres sqlalchemy alembic jinja шаблон кэш сессия поиск "
+    "история заметка путешествие книга фильм музыка погода работа отпуск "
+    "идея вопрос решение ошибка релиз команда встреча план итог новость"
+).split()
+
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 18))
+
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(2, 7)))
+
+
+def make_posts(rng, user_ids, count, now):
+    for _ in range(count):
+        body = "\n\n".join(paragraph(rng) for _ in range(rng.randint(1, 6)))
+        author_index = min(int(rng.paretovariate(1.2)) - 1, len(user_ids) - 1)
+        title = sentence(rng)[:100]
+        yield {
+            **new_post_values(user_ids[author_index], title, body),
+            "created_at": now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+        }
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def seed(
+    users: int, posts: int, batch_size: int, reset: bool, seed_value: int
+):
+    rng = random.Random(seed_value)
+    password = pwd_context.hash(BENCH_PASSWORD)
+    now = datetime.now()
+    started = time.perf_counter()
+
+    async with async_engine.begin() as conn:
+        if reset:
+            await conn.execute(
+                text(
+                    "TRUNCATE posts, post_locations, sessions, users "
+                    "RESTART IDENTITY CASCADE"
+                )
+            )
+
+        user_rows = (
+            {
+                "username": f"{BENCH_USERNAME_PREFIX}{i}",
+                "password": password,
+                "role": "user",
+                "is_blocked": False,
+                "created_at": now - timedelta(days=rng.randint(30, 730)),
+            }
+            for i in range(users)
+        )
+        for batch in batched(user_rows, batch_size):
+            await conn.execute(insert(User), batch)
+
+        user_ids = (
+            await conn.scalars(
+                select(User.id)
+                .where(User.username.startswith(BENCH_USERNAME_PREFIX))
+                .order_by(User.id)
+            )
+        ).all()
+        rng.shuffle(user_ids)
+        await ensure_partitions(conn, now - timedelta(days=365), now)
+
+        for batch in batched(make_posts(rng, user_ids, posts, now), batch_size):
+            await conn.execute(insert(Post), batch)
+
+        await recompute_user_stats(conn)
+
+    async with async_engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE users"))
+        await conn.execute(text("VACUUM ANALYZE posts"))
+    await async_engine.dispose()
+
+    print(
+        f"seeded {users} users and {posts} posts "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the database with test data")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--reset", action="store_true", help="truncate users and posts first"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(seed(args.users, args.posts, args.batch_size, args.reset, args.seed))
+
+
+if __name__ == "__main__":
+    main()
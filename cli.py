@@ -0,0 +1,615 @@
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from itertools import chain
+
+import orjson
+from sqlalchemy import (
+    TIMESTAMP,
+    Boolean,
+    Integer,
+    Text,
+    any_,
+    bindparam,
+    column,
+    delete,
+    func,
+    select,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.core.config import settings
+from app.core.markup import MARKDOWN_VERSION, html_text, render_markdown
+from app.core.security import pwd_context
+from app.db.db import async_engine
+from app.db.models import Post, TimelineEntry, User, make_excerpt, post_locations
+from app.db.notifications import notify_query
+from app.db.partitions import (
+    add_months,
+    create_future_partitions,
+    ensure_partitions,
+    list_partitions,
+)
+
+USER_COLUMNS = ("source_id", "username", "password", "role", "created_at")
+POST_COLUMNS = (
+    "author_id",
+    "title",
+    "body",
+    "excerpt",
+    "excerpt_has_more",
+    "body_html",
+    "body_html_version",
+    "created_at",
+)
+
+INSERT_IMPORTED_USERS = text(
+    """
+    WITH inserted AS (
+        INSERT INTO users (username, password, role, is_blocked, created_at)
+        SELECT username, password, role, false, created_at FROM import_users
+        ON CONFLICT (username) DO NOTHING
+        RETURNING id, username
+    )
+    SELECT import_users.source_id, import_users.username,
+        coalesce(inserted.id, users.id) AS id, inserted.id IS NULL AS existing
+    FROM import_users
+    LEFT JOIN inserted USING (username)
+    LEFT JOIN users USING (username)
+    """
+)
+MAX_REPORTED_NAMES = 20
+
+EXPORT_QUERIES = {
+    "posts": select(
+        Post.id,
+        Post.author_id,
+        Post.title,
+        Post.body,
+        Post.created_at,
+        Post.updated_at,
+    ).order_by(Post.id),
+    "users": select(
+        User.id,
+        User.username,
+        User.password.label("password_hash"),
+        User.role,
+        User.created_at,
+    ).order_by(User.id),
+}
+
+
+class ImportConflict(Exception):
+    pass
+
+
+def name_list(names) -> str:
+    names = sorted(names)
+    listed = ", ".join(names[:MAX_REPORTED_NAMES])
+    if len(names) > MAX_REPORTED_NAMES:
+        listed += f" and {len(names) - MAX_REPORTED_NAMES} more"
+
+    return listed
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def read_rows(path: str, fmt: str):
+    if path == "-":
+        file = open(sys.stdin.fileno(), "rb", closefd=False)
+    else:
+        file = open(path, "rb")
+
+    with file:
+        if fmt == "csv":
+            lines = (line.decode() for line in file)
+            yield from csv.DictReader(lines)
+        else:
+            for line in file:
+                if line.strip():
+                    yield orjson.loads(line)
+
+
+def parse_time(value) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def month_arg(value: str) -> date:
+    try:
+        return date.fromisoformat(f"{value}-01")
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected YYYY-MM")
+
+
+def csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def hash_passwords(rows: list[dict], executor) -> list[str]:
+    loop = asyncio.get_running_loop()
+
+    async def one(row):
+        if row.get("password_hash"):
+            return row["password_hash"]
+
+        return await loop.run_in_executor(executor, pwd_context.hash, row["password"])
+
+    return await asyncio.gather(*(one(row) for row in rows))
+
+
+async def recompute_user_stats(conn, author_ids=None) -> None:
+    stats = select(
+        Post.author_id,
+        func.count().label("post_count"),
+        func.max(Post.created_at).label("recent_post_at"),
+    ).group_by(Post.author_id)
+    if author_ids is not None:
+        stats = stats.where(
+            Post.author_id
+            == any_(bindparam("author_ids", list(author_ids), type_=ARRAY(Integer)))
+        )
+    stats = stats.subquery()
+
+    await conn.execute(
+        update(User)
+        .where(User.id == stats.c.author_id)
+        .values(post_count=stats.c.post_count, recent_post_at=stats.c.recent_post_at)
+    )
+
+
+async def import_users(
+    conn, driver, rows, batch_size: int, executor, now, map_existing: bool = False
+) -> tuple[dict, list[str]]:
+    await conn.execute(
+        text(
+            "CREATE TEMP TABLE import_users (source_id bigint, username text, "
+            "password text, role text, created_at timestamp) ON COMMIT DROP"
+        )
+    )
+    id_map = {}
+    seen = set()
+    duplicates = set()
+    existing = []
+    taken = []
+    for batch in batched(rows, batch_size):
+        unique = []
+        for row in batch:
+            if row["username"] in seen:
+                duplicates.add(row["username"])
+            else:
+                seen.add(row["username"])
+                unique.append(row)
+        batch = unique
+
+        passwords = await hash_passwords(batch, executor)
+        await driver.copy_records_to_table(
+            "import_users",
+            records=[
+                (
+                    int(row["id"]),
+                    row["username"],
+                    password,
+                    row.get("role") or "user",
+                    parse_time(row.get("created_at")) or now,
+                )
+                for row, password in zip(batch, passwords)
+            ],
+            columns=USER_COLUMNS,
+        )
+        for row in await conn.execute(INSERT_IMPORTED_USERS):
+            if row.existing and (row.id is None or not map_existing):
+                taken.append(row.username)
+                continue
+
+            if row.existing:
+                existing.append(row.username)
+            id_map[row.source_id] = row.id
+        await conn.execute(text("TRUNCATE import_users"))
+
+    if duplicates:
+        raise ImportConflict(
+            f"usernames repeated in the import: {name_list(duplicates)}"
+        )
+    if taken:
+        raise ImportConflict(
+            f"usernames already taken: {name_list(taken)}; "
+            "rerun with --map-existing to attach their posts to those accounts"
+        )
+
+    return id_map, existing
+
+
+async def import_posts(
+    conn, driver, rows, batch_size: int, id_map, now
+) -> tuple[set, int]:
+    author_ids = set()
+    skipped = 0
+    for batch in batched(rows, batch_size):
+        records = []
+        for row in batch:
+            author_id = int(row["author_id"])
+            if id_map is not None:
+                author_id = id_map.get(author_id)
+                if author_id is None:
+                    skipped += 1
+                    continue
+
+            body_html, excerpt, excerpt_has_more = render_body(row["body"])
+            records.append(
+                (
+                    author_id,
+                    row["title"],
+                    row["body"],
+                    excerpt,
+                    excerpt_has_more,
+                    body_html,
+                    MARKDOWN_VERSION,
+                    parse_time(row.get("created_at")) or now,
+                )
+            )
+            author_ids.add(author_id)
+
+        if records:
+            created_at = [record[-1] for record in records]
+            await ensure_partitions(conn, min(created_at), max(created_at))
+            await driver.copy_records_to_table(
+                "posts", records=records, columns=POST_COLUMNS
+            )
+
+    return author_ids, skipped
+
+
+async def run_import(args) -> None:
+    started = time.perf_counter()
+    now = datetime.now()
+    executor = ThreadPoolExecutor(max_workers=args.hash_workers)
+
+    async with async_engine.begin() as conn:
+        driver = (await conn.get_raw_connection()).driver_connection
+        id_map = None
+        if args.users:
+            id_map, existing = await import_users(
+                conn,
+                driver,
+                read_rows(args.users, args.format),
+                args.batch_size,
+                executor,
+                now,
+                args.map_existing,
+            )
+            print(
+                f"imported {len(id_map) - len(existing)} users",
+                file=sys.stderr,
+            )
+            if existing:
+                print(
+                    f"mapped {len(existing)} users to existing accounts: "
+                    f"{name_list(existing)}",
+                    file=sys.stderr,
+                )
+
+        if args.posts:
+            author_ids, skipped = await import_posts(
+                conn,
+                driver,
+                read_rows(args.posts, args.format),
+                args.batch_size,
+                id_map,
+                now,
+            )
+            await recompute_user_stats(conn, author_ids)
+            print(
+                f"imported posts for {len(author_ids)} authors, "
+                f"skipped {skipped} posts of unknown authors",
+                file=sys.stderr,
+            )
+
+    async with async_engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE users"))
+        await conn.execute(text("ANALYZE posts"))
+    await async_engine.dispose()
+    executor.shutdown()
+
+    print(f"done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+async def run_export(args) -> None:
+    stmt = EXPORT_QUERIES[args.table].execution_options(
+        yield_per=settings.STREAM_CHUNK_SIZE
+    )
+    if args.output == "-":
+        output = os.fdopen(sys.stdout.fileno(), "wb", closefd=False)
+    else:
+        output = open(args.output, "wb")
+
+    async with async_engine.connect() as conn:
+        result = await conn.stream(stmt)
+        if args.format == "csv":
+            text_output = open(output.fileno(), "w", newline="", closefd=False)
+            writer = csv.writer(text_output)
+            writer.writerow(result.keys())
+            async for rows in result.partitions():
+                writer.writerows(map(csv_value, row) for row in rows)
+            text_output.flush()
+        else:
+            async for rows in result.mappings().partitions():
+                output.write(
+                    b"".join(
+                        orjson.dumps(dict(row), option=orjson.OPT_APPEND_NEWLINE)
+                        for row in rows
+                    )
+                )
+
+    output.close()
+    await async_engine.dispose()
+
+
+def render_body(body: str) -> tuple[str, str, bool]:
+    body_html = render_markdown(body)
+
+    return body_html, *make_excerpt(html_text(body_html))
+
+
+def render_bodies(bodies: list[str]) -> list[tuple[str, str, bool]]:
+    return [render_body(body) for body in bodies]
+
+
+async def store_rendered(conn, rows, results) -> None:
+    rendered = values(
+        column("id", Integer),
+        column("created_at", TIMESTAMP),
+        column("body_html", Text),
+        column("excerpt", Text),
+        column("excerpt_has_more", Boolean),
+        name="rendered",
+    ).data([(row.id, row.created_at, *result) for row, result in zip(rows, results)])
+    author_ids = await conn.scalars(
+        update(Post)
+        .where(Post.id == rendered.c.id, Post.created_at == rendered.c.created_at)
+        .values(
+            body_html=rendered.c.body_html,
+            body_html_version=MARKDOWN_VERSION,
+            excerpt=rendered.c.excerpt,
+            excerpt_has_more=rendered.c.excerpt_has_more,
+        )
+        .returning(Post.author_id)
+    )
+    author_ids = sorted(set(author_ids))
+    await conn.execute(
+        update(User)
+        .where(User.id == any_(bindparam("ids", author_ids, type_=ARRAY(Integer))))
+        .values(updated_at=func.now())
+    )
+    await conn.execute(notify_query("page", "post"))
+    await conn.execute(notify_query("page", "feed"))
+
+
+async def run_rerender(args) -> None:
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    executor = ProcessPoolExecutor(max_workers=args.workers)
+    chunk = -(-args.batch_size // args.workers)
+    last_id = 0
+    total = 0
+
+    while True:
+        async with async_engine.begin() as conn:
+            rows = (
+                await conn.execute(
+                    select(Post.id, Post.created_at, Post.body)
+                    .where(Post.id > last_id, Post.body_html_version < MARKDOWN_VERSION)
+                    .order_by(Post.id)
+                    .limit(args.batch_size)
+                )
+            ).all()
+            if not rows:
+                break
+
+            bodies = [row.body or "" for row in rows]
+            chunks = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor, render_bodies, bodies[start : start + chunk]
+                    )
+                    for start in range(0, len(bodies), chunk)
+                )
+            )
+            await store_rendered(conn, rows, chain.from_iterable(chunks))
+
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f"re-rendered {total} posts", file=sys.stderr)
+
+    await async_engine.dispose()
+    executor.shutdown()
+
+    print(f"done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+async def run_create_partitions(args) -> None:
+    async with async_engine.begin() as conn:
+        created = await create_future_partitions(conn)
+    await async_engine.dispose()
+
+    print(f"created {len(created)} partitions {' '.join(created)}", file=sys.stderr)
+
+
+async def archived_name(conn, name: str) -> str:
+    archived, suffix = f"{name}_archived", 1
+    while await conn.scalar(text("SELECT to_regclass(:name)"), {"name": archived}):
+        suffix += 1
+        archived = f"{name}_archived_{suffix}"
+
+    return archived
+
+
+async def detach_partition(conn, name: str, month: date) -> str:
+    end = add_months(month, 1)
+    author_ids = (
+        await conn.scalars(text(f"SELECT DISTINCT author_id FROM {name}"))
+    ).all()
+    await conn.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.post_created_at >= month,
+            TimelineEntry.post_created_at < end,
+        )
+    )
+    await conn.execute(
+        post_locations.delete().where(
+            post_locations.c.created_at >= month, post_locations.c.created_at < end
+        )
+    )
+    await conn.execute(text(f"ALTER TABLE posts DETACH PARTITION {name}"))
+    archived = await archived_name(conn, name)
+    await conn.execute(text(f"ALTER TABLE {name} RENAME TO {archived}"))
+    await conn.execute(
+        update(User)
+        .where(User.id == any_(bindparam("ids", author_ids, type_=ARRAY(Integer))))
+        .values(post_count=0, recent_post_at=None)
+    )
+    await recompute_user_stats(conn, author_ids)
+    await conn.execute(notify_query("page", "post"))
+    await conn.execute(notify_query("page", "feed"))
+
+    return archived
+
+
+async def move_partition(conn, name: str, tablespace: str) -> None:
+    tablespace = conn.dialect.identifier_preparer.quote(tablespace)
+    await conn.execute(text(f"ALTER TABLE {name} SET TABLESPACE {tablespace}"))
+    indexes = await conn.scalars(
+        text(
+            "SELECT indexrelid::regclass::text FROM pg_index "
+            "WHERE indrelid = CAST(:name AS regclass)"
+        ),
+        {"name": name},
+    )
+    for index in indexes.all():
+        await conn.execute(text(f"ALTER INDEX {index} SET TABLESPACE {tablespace}"))
+
+
+async def run_archive(args) -> None:
+    before = args.before
+    async with async_engine.connect() as conn:
+        partitions = [
+            (name, month)
+            for name, month in await list_partitions(conn)
+            if add_months(month, 1) <= before
+        ]
+
+    for name, month in partitions:
+        async with async_engine.begin() as conn:
+            if args.detach:
+                archived = await detach_partition(conn, name, month)
+            else:
+                await move_partition(conn, name, args.tablespace)
+        if args.detach:
+            print(f"detached {name} as {archived}", file=sys.stderr)
+        else:
+            print(f"moved {name}", file=sys.stderr)
+
+    await async_engine.dispose()
+
+
+async def run_recompute(args) -> None:
+    async with async_engine.begin() as conn:
+        await recompute_user_stats(conn)
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk blog maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import", help="load users and posts with COPY in one transaction"
+    )
+    import_parser.add_argument(
+        "--users", help="users with id, username, password or password_hash"
+    )
+    import_parser.add_argument(
+        "--posts", help="posts with author_id, title, body and optional created_at"
+    )
+    import_parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    import_parser.add_argument("--batch-size", type=int, default=5_000)
+    import_parser.add_argument("--hash-workers", type=int, default=os.cpu_count())
+    import_parser.add_argument(
+        "--map-existing",
+        action="store_true",
+        help="attach posts of users whose username is taken to the existing accounts",
+    )
+    import_parser.set_defaults(handler=run_import)
+
+    export_parser = commands.add_parser("export", help="stream a table to a file")
+    export_parser.add_argument("table", choices=sorted(EXPORT_QUERIES))
+    export_parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    export_parser.add_argument("--output", default="-")
+    export_parser.set_defaults(handler=run_export)
+
+    recompute_parser = commands.add_parser(
+        "recompute-counters", help="recount post_count and recent_post_at"
+    )
+    recompute_parser.set_defaults(handler=run_recompute)
+
+    rerender_parser = commands.add_parser(
+        "rerender",
+        help="re-render body_html of posts rendered by an older MARKDOWN_VERSION",
+    )
+    rerender_parser.add_argument("--batch-size", type=int, default=1_000)
+    rerender_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    rerender_parser.set_defaults(handler=run_rerender)
+
+    partitions_parser = commands.add_parser(
+        "create-partitions",
+        help="create posts partitions up to POSTS_PARTITIONS_AHEAD months ahead",
+    )
+    partitions_parser.set_defaults(handler=run_create_partitions)
+
+    archive_parser = commands.add_parser(
+        "archive-partitions", help="detach or move posts partitions of old months"
+    )
+    archive_parser.add_argument(
+        "--before", type=month_arg, required=True, help="archive months before YYYY-MM"
+    )
+    archive_target = archive_parser.add_mutually_exclusive_group(required=True)
+    archive_target.add_argument(
+        "--detach",
+        action="store_true",
+        help="detach and rename to *_archived, removing them from the blog",
+    )
+    archive_target.add_argument(
+        "--tablespace", help="move partitions and their indexes to this tablespace"
+    )
+    archive_parser.set_defaults(handler=run_archive)
+
+    args = parser.parse_args()
+    if args.command == "import" and not (args.users or args.posts):
+        parser.error("import needs --users, --posts or both")
+
+    try:
+        asyncio.run(args.handler(args))
+    except ImportConflict as error:
+        sys.exit(f"import rolled back, {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,89 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from app.api.endpoints import router
+from app.api.health import router as health_router
+from app.api.json_endpoints import router as json_router
+from app.api.metrics import router as metrics_router
+from app.core.cache import page_cache
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.limits import AdmissionMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.sessions import session_store
+from app.core.static import STATIC_DIRECTORY, STATIC_PREFIX, CachedStaticFiles
+from app.core.templating import precompile_templates
+from app.db.db import async_engine, dispose_engines, warm_up_pools
+from app.db.notifications import listen_for_invalidations
+from app.db.partitions import maintain_partitions
+from app.repositories.outbox import outbox_worker
+
+logger = logging.getLogger("app")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    compiled = precompile_templates()
+    uses_database = settings.REPOSITORY_BACKEND == "sqlalchemy"
+    if uses_database:
+        await warm_up_pools(settings.DB_WARMUP_CONNECTIONS)
+    logger.info(
+        "compiled %d templates and opened %d connections per pool in %.3fs",
+        compiled,
+        settings.DB_WARMUP_CONNECTIONS if uses_database else 0,
+        time.perf_counter() - started,
+    )
+    if settings.OUTBOX_WORKER and uses_database:
+        outbox_worker.start()
+    if uses_database:
+        partitions = asyncio.create_task(
+            maintain_partitions(async_engine, settings.POSTS_PARTITION_CHECK_INTERVAL)
+        )
+        invalidations = asyncio.create_task(
+            listen_for_invalidations(
+                settings.db_url_asyncpg,
+                {"page": page_cache.invalidate, "session": session_store.forget},
+            )
+        )
+    app.state.ready = True
+
+    yield
+
+    app.state.ready = False
+    if uses_database:
+        partitions.cancel()
+        invalidations.cancel()
+        await asyncio.gather(partitions, invalidations, return_exceptions=True)
+    await outbox_worker.stop()
+    await dispose_engines()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    max_concurrent=settings.MAX_CONCURRENT_REQUESTS,
+    shed_pool_wait=settings.SHED_POOL_WAIT_MS / 1000,
+)
+app.add_middleware(MetricsMiddleware)
+if settings.FORWARDED_ALLOW_IPS:
+    app.add_middleware(
+        ProxyHeadersMiddleware, trusted_hosts=settings.FORWARDED_ALLOW_IPS
+    )
+app.mount(STATIC_PREFIX, CachedStaticFiles(directory=STATIC_DIRECTORY), name="static")
 app.include_router(router)
+app.include_router(json_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,214 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from app.core.cache import page_cache
+from app.db.models import Post, User
+from app.repositories.repository import (
+    SQLAlchemyBlogRepository,
+    create_post_query,
+    new_post_values,
+)
+from cli import (
+    EXPORT_QUERIES,
+    ImportConflict,
+    import_posts,
+    import_users,
+    recompute_user_stats,
+    render_bodies,
+    store_rendered,
+)
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD_HASH = "$2b$12$" + "a" * 53
+
+
+async def test_import_round_trip(conn):
+    driver = (await conn.get_raw_connection()).driver_connection
+    now = datetime(2024, 5, 1)
+    users = [
+        {"id": "7", "username": "import_alice", "password_hash": PASSWORD_HASH},
+        {
+            "id": "9",
+            "username": "import_bob",
+            "password_hash": PASSWORD_HASH,
+            "role": "admin",
+            "created_at": "2023-11-02T10:00:00",
+        },
+    ]
+    posts = [
+        {"author_id": "7", "title": "first", "body": "**hello**"},
+        {
+            "author_id": "9",
+            "title": "second",
+            "body": "world",
+            "created_at": "2023-12-24T18:30:00",
+        },
+        {"author_id": "42", "title": "orphan", "body": "unknown author"},
+    ]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        id_map, existing = await import_users(conn, driver, users, 1, executor, now)
+    assert set(id_map) == {7, 9}
+    assert existing == []
+
+    author_ids, skipped = await import_posts(conn, driver, posts, 2, id_map, now)
+    await recompute_user_stats(conn, author_ids)
+    assert author_ids == {id_map[7], id_map[9]}
+    assert skipped == 1
+
+    exported_users = {
+        row.id: row
+        for row in await conn.execute(
+            EXPORT_QUERIES["users"].where(User.id.in_(id_map.values()))
+        )
+    }
+    alice, bob = exported_users[id_map[7]], exported_users[id_map[9]]
+    assert (alice.username, alice.role, alice.created_at) == (
+        "import_alice",
+        "user",
+        now,
+    )
+    assert (bob.username, bob.role) == ("import_bob", "admin")
+    assert bob.created_at == datetime(2023, 11, 2, 10)
+    assert alice.password_hash == bob.password_hash == PASSWORD_HASH
+
+    exported_posts = (
+        await conn.execute(
+            EXPORT_QUERIES["posts"].where(Post.author_id.in_(id_map.values()))
+        )
+    ).all()
+    assert [
+        (row.author_id, row.title, row.body, row.created_at) for row in exported_posts
+    ] == [
+        (id_map[7], "first", "**hello**", now),
+        (id_map[9], "second", "world", datetime(2023, 12, 24, 18, 30)),
+    ]
+
+    stats = (
+        await conn.execute(
+            select(User.id, User.post_count, User.recent_post_at).where(
+                User.id.in_(id_map.values())
+            )
+        )
+    ).all()
+    assert sorted(stats) == sorted(
+        [(id_map[7], 1, now), (id_map[9], 1, datetime(2023, 12, 24, 18, 30))]
+    )
+
+
+def import_rows(*pairs) -> list[dict]:
+    return [
+        {"id": source_id, "username": username, "password_hash": PASSWORD_HASH}
+        for source_id, username in pairs
+    ]
+
+
+async def existing_user(conn, username: str) -> int:
+    return await conn.scalar(
+        insert(User)
+        .values(username=username, password=PASSWORD_HASH)
+        .returning(User.id)
+    )
+
+
+async def test_import_fails_on_taken_usernames(conn):
+    driver = (await conn.get_raw_connection()).driver_connection
+    await existing_user(conn, "import_taken")
+    users = import_rows(("1", "import_fresh"), ("2", "import_taken"))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ImportConflict, match="already taken: import_taken"):
+            await import_users(conn, driver, users, 1, executor, datetime(2024, 5, 1))
+
+
+async def test_import_maps_taken_usernames_when_asked(conn):
+    driver = (await conn.get_raw_connection()).driver_connection
+    taken_id = await existing_user(conn, "import_taken")
+    users = import_rows(("1", "import_fresh"), ("2", "import_taken"))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        id_map, existing = await import_users(
+            conn, driver, users, 1, executor, datetime(2024, 5, 1), True
+        )
+
+    assert id_map[2] == taken_id
+    assert id_map[1] != taken_id
+    assert existing == ["import_taken"]
+    password = await conn.scalar(select(User.password).where(User.id == taken_id))
+    assert password == PASSWORD_HASH
+
+
+async def test_import_fails_on_usernames_repeated_across_batches(conn):
+    driver = (await conn.get_raw_connection()).driver_connection
+    users = import_rows(
+        ("1", "import_twice"), ("2", "import_once"), ("3", "import_twice")
+    )
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ImportConflict, match="in the import: import_twice"):
+            await import_users(
+                conn, driver, users, 1, executor, datetime(2024, 5, 1), True
+            )
+
+
+def page_request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [],
+            "query_string": b"",
+        }
+    )
+
+
+async def test_rerender_changes_feed_and_profile_validators(conn):
+    author_id = await conn.scalar(
+        insert(User)
+        .values(username="rerender_author", password="x")
+        .returning(User.id)
+    )
+    post_id = await conn.scalar(
+        create_post_query(new_post_values(author_id, "stale", "**old** excerpt"))
+    )
+    stale = datetime(2024, 1, 1)
+    await conn.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(excerpt="**old** excerpt", body_html_version=0, updated_at=stale)
+    )
+    await conn.execute(
+        update(User).where(User.id == author_id).values(updated_at=stale)
+    )
+    db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+    repository = SQLAlchemyBlogRepository(db)
+
+    async def validators():
+        page_cache.invalidate()
+        feed = await repository.get_all_blogs(page_request(), None)
+        profile = await repository.get_user(page_request(), author_id, None)
+
+        return feed.headers["ETag"], profile.headers["ETag"]
+
+    before = await validators()
+    rows = (
+        await conn.execute(
+            select(Post.id, Post.created_at, Post.body).where(Post.id == post_id)
+        )
+    ).all()
+    await store_rendered(conn, rows, render_bodies([row.body for row in rows]))
+    after = await validators()
+    excerpt = await conn.scalar(select(Post.excerpt).where(Post.id == post_id))
+    page_cache.invalidate()
+    await db.close()
+
+    assert excerpt == "old excerpt"
+    assert after[0] != before[0]
+    assert after[1] != before[1]
@@ -0,0 +1,90 @@
+import asyncio
+import zlib
+
+import pytest
+
+from app.core.compression import CompressionMiddleware
+
+pytestmark = pytest.mark.anyio
+
+ROWS = b"<tr><td>row</td><td>2024-01-01</td></tr>\n" * 400
+
+
+def decoder(encoding: str):
+    if encoding == "gzip":
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress
+
+    brotli = pytest.importorskip("brotli")
+
+    return brotli.Decompressor().process
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+def request_scope(encoding: str) -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", encoding.encode())],
+    }
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+async def test_streamed_chunk_is_decodable_before_body_ends(encoding):
+    decode = decoder(encoding)
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": ROWS, "more_body": True})
+        await release.wait()
+        await send({"type": "http.response.body", "body": ROWS, "more_body": False})
+
+    messages = asyncio.Queue()
+    middleware = CompressionMiddleware(app, minimum_size=1000)
+    response = asyncio.create_task(
+        middleware(request_scope(encoding), receive, messages.put)
+    )
+
+    start = await messages.get()
+    assert dict(start["headers"])[b"content-encoding"] == encoding.encode()
+    assert b"content-length" not in dict(start["headers"])
+    first = await messages.get()
+    assert first["more_body"]
+    assert decode(first["body"]) == ROWS
+
+    release.set()
+    last = await messages.get()
+    assert decode(last["body"]) == ROWS
+    await response
+
+
+@pytest.mark.parametrize(
+    ("body", "encoded"), [(ROWS, b"gzip"), (b"<p>short</p>", None)]
+)
+async def test_whole_responses_are_compressed_from_minimum_size(body, encoded):
+    async def app(scope, receive, send):
+        headers = [(b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await CompressionMiddleware(app, minimum_size=1000)(
+        request_scope("gzip"), receive, send
+    )
+
+    start, message = messages
+    headers = dict(start["headers"])
+    assert headers.get(b"content-encoding") == encoded
+    assert headers[b"content-length"] == str(len(message["body"])).encode()
+    if encoded:
+        assert decoder("gzip")(message["body"]) == body
+    else:
+        assert message["body"] == body
@@ -0,0 +1,25 @@
+from fastapi.dependencies.utils import get_dependant
+
+from app.api.endpoints import REPOSITORY_DEPENDENCIES
+from app.db.db import get_async_db, get_read_db, get_reader
+
+
+def dependency_calls(call) -> set:
+    calls = set()
+    pending = list(get_dependant(path="/", call=call).dependencies)
+    while pending:
+        dependant = pending.pop()
+        calls.add(dependant.call)
+        pending.extend(dependant.dependencies)
+
+    return calls
+
+
+def test_memory_repository_needs_no_database():
+    assert not dependency_calls(REPOSITORY_DEPENDENCIES["memory"])
+
+
+def test_database_repository_opens_sessions():
+    assert {get_async_db, get_read_db, get_reader} <= dependency_calls(
+        REPOSITORY_DEPENDENCIES["sqlalchemy"]
+    )
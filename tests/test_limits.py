@@ -0,0 +1,47 @@
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.core.limits import RateLimiter, rate_limit
+
+pytestmark = pytest.mark.anyio
+
+PROXY = "10.0.0.1"
+
+
+def test_rejected_request_does_not_spend_other_buckets():
+    limiter = RateLimiter("test", per_minute=1, burst=2, max_keys=100)
+    session = ("session", "shared")
+    for _ in range(2):
+        assert limiter.acquire([("ip", "a"), session]) == 0
+
+    assert limiter.acquire([("ip", "b"), session]) > 0
+
+    assert limiter.acquire([("ip", "b")]) == 0
+    assert limiter.acquire([("ip", "b")]) == 0
+    assert limiter.acquire([("ip", "b")]) > 0
+
+
+async def test_clients_behind_a_trusted_proxy_get_their_own_buckets():
+    limiter = RateLimiter("test", per_minute=1, burst=1, max_keys=100)
+    app = FastAPI()
+
+    @app.post("/", dependencies=[Depends(rate_limit(limiter))])
+    async def endpoint():
+        return {}
+
+    transport = httpx.ASGITransport(
+        app=ProxyHeadersMiddleware(app, trusted_hosts=PROXY), client=(PROXY, 1234)
+    )
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as client:
+
+        async def post(client_ip):
+            response = await client.post("/", headers={"X-Forwarded-For": client_ip})
+            return response.status_code
+
+        assert await post("192.0.2.1") == 200
+        assert await post("192.0.2.2") == 200
+        assert await post("192.0.2.1") == 429
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.notifications import listen_for_invalidations, notify_query
+from app.repositories.repository import new_post_values
+
+pytestmark = pytest.mark.anyio
+
+
+def test_excerpt_is_rendered_text():
+    post = new_post_values(1, "title", "**hello** & [world](http://example.com)")
+
+    assert post["excerpt"] == "hello & world"
+    assert not post["excerpt_has_more"]
+
+
+async def test_invalidation_reaches_listener(migrated_database):
+    engine = create_async_engine(settings.db_url_asyncpg, poolclass=NullPool)
+    received = []
+    delivered = asyncio.Event()
+
+    def invalidate(route):
+        received.append(route)
+        if route is not None:
+            delivered.set()
+
+    listener = asyncio.create_task(
+        listen_for_invalidations(settings.db_url_asyncpg, {"page": invalidate})
+    )
+    try:
+        while not received:
+            await asyncio.sleep(0.01)
+        async with engine.begin() as conn:
+            await conn.execute(notify_query("page", "post"))
+        await asyncio.wait_for(delivered.wait(), 5)
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        await engine.dispose()
+
+    assert received == [None, "post"]
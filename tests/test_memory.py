@@ -0,0 +1,292 @@
+import re
+from datetime import datetime, timedelta
+from functools import partial
+
+import httpx
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.endpoints import get_repository
+from app.core.cache import page_cache
+from app.core.config import settings
+from app.core.security import password_hasher
+from app.core.sessions import session_store
+from app.db.models import User
+from app.db.partitions import ensure_partitions
+from app.repositories.memory import InMemoryBlogRepository, MemoryStore
+from app.repositories.repository import (
+    SQLAlchemyBlogRepository,
+    create_post_query,
+    new_post_values,
+    users_query,
+)
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2099, 1, 1)
+USERS = [
+    ("parity_ann", START),
+    ("parity_ben", START + timedelta(days=1)),
+    ("parity_cat", START + timedelta(days=1)),
+    ("parity_dan", START + timedelta(days=2)),
+    ("parity_eve", START + timedelta(days=3)),
+]
+POSTS = [
+    ("parity_ann", 0),
+    ("parity_ben", 1),
+    ("parity_cat", 2),
+    ("parity_ann", 3),
+    ("parity_eve", 4),
+    ("parity_ann", 5),
+    ("parity_ben", 5),
+    ("parity_cat", 5),
+    ("parity_eve", 6),
+]
+FOLLOWS = [
+    ("parity_dan", "parity_eve"),
+    ("parity_dan", "parity_ann"),
+    ("parity_ben", "parity_eve"),
+]
+POST_LINK = re.compile(r'href="/api/blog/(\d+)"')
+OLDER_LINK = re.compile(r'href="/api/timeline/\?before=([^"]+)"')
+NEWER_LINK = re.compile(r'href="/api/timeline/\?after=([^"]+)"')
+
+
+def post_values(author_id: int, index: int, minute: int) -> dict:
+    values = new_post_values(author_id, f"post {index}", f"body of post {index}")
+    values["created_at"] = START + timedelta(minutes=minute)
+
+    return values
+
+
+def fill_store(store: MemoryStore) -> dict[str, int]:
+    ids = {}
+    for username, created_at in USERS:
+        ids[username] = store.add_user(username, "x", created_at=created_at).id
+    for index, (author, minute) in enumerate(POSTS):
+        store.add_post(post_values(ids[author], index, minute))
+
+    return ids
+
+
+def newest_first(authors=None) -> list[str]:
+    keys = [
+        (minute, index)
+        for index, (author, minute) in enumerate(POSTS)
+        if authors is None or author in authors
+    ]
+
+    return [f"post {index}" for _, index in sorted(keys, reverse=True)]
+
+
+def titles_on_page(store: MemoryStore, html: str) -> list[str]:
+    return [store.posts[int(post_id)].title for post_id in POST_LINK.findall(html)]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setitem(
+        app.dependency_overrides,
+        get_repository,
+        lambda: InMemoryBlogRepository(store),
+    )
+    page_cache.invalidate()
+    yield store
+    page_cache.invalidate()
+
+
+@pytest.fixture
+async def client(store):
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+    ) as client:
+        yield client
+
+
+async def walk_json(client, url: str) -> list[list[dict]]:
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": 2} | ({"before": cursor} if cursor else {})
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append(page["items"])
+        cursor = page["older"]
+        if cursor is None:
+            return pages
+
+
+async def test_feed_and_profile_are_newest_first_with_usernames(store, client):
+    ids = fill_store(store)
+    titles = {post.title: post for post in store.posts.values()}
+
+    pages = await walk_json(client, "/api/v1/posts/")
+    rows = [row for page in pages for row in page]
+    assert [row["title"] for row in rows] == newest_first()
+    assert all(len(page) <= 2 for page in pages)
+    for row in rows:
+        author_id = titles[row["title"]].author_id
+        assert row["username"] == store.users[author_id].username
+
+    response = await client.get("/api/blog/")
+    assert response.status_code == 200
+    assert "parity_eve" in response.text
+
+    ann = ids["parity_ann"]
+    pages = await walk_json(client, f"/api/v1/users/{ann}/posts/")
+    expected = newest_first(authors={"parity_ann"})
+    assert [row["title"] for page in pages for row in page] == expected
+
+    response = await client.get(f"/api/users/{ann}/")
+    assert response.status_code == 200
+    assert titles_on_page(store, response.text) == expected
+
+
+async def test_users_are_ranked_like_the_sql_ordering(store, client):
+    fill_store(store)
+
+    response = await client.get("/api/v1/users/", params={"limit": 100})
+
+    assert [user["username"] for user in response.json()["items"]] == [
+        "parity_ann",
+        "parity_eve",
+        "parity_cat",
+        "parity_ben",
+        "parity_dan",
+    ]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/blog/999/",
+        "/api/users/999/",
+        "/api/v1/posts/999/",
+        "/api/v1/users/999/",
+        "/api/v1/users/999/posts/",
+    ],
+)
+async def test_missing_rows_return_404(store, client, url):
+    fill_store(store)
+
+    response = await client.get(url)
+
+    assert response.status_code == 404
+
+
+async def test_user_without_posts_has_an_empty_page(store, client):
+    user_id = store.add_user("parity_quiet", "x").id
+
+    response = await client.get(f"/api/v1/users/{user_id}/posts/")
+
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+async def test_duplicate_signup_returns_400(store, client, monkeypatch):
+    async def fake_hash(password):
+        return "hash"
+
+    monkeypatch.setattr(password_hasher, "hash", fake_hash)
+    fill_store(store)
+
+    response = await client.post(
+        "/api/signup/", data={"username": "parity_ann", "password": "secret"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already exists"
+
+    response = await client.post(
+        "/api/signup/", data={"username": "parity_new", "password": "secret"}
+    )
+    assert response.status_code == 303
+    assert "parity_new" in store.usernames
+
+
+async def test_timeline_pages_through_followed_authors(store, client, monkeypatch):
+    monkeypatch.setattr(settings, "FEED_PAGE_SIZE", 2)
+    ids = fill_store(store)
+    client.cookies.set("session_id", await session_store.create(ids["parity_dan"]))
+    for follower, followee in FOLLOWS:
+        if follower == "parity_dan":
+            response = await client.post(f"/api/users/{ids[followee]}/follow/")
+            assert response.status_code == 303
+
+    pages = []
+    url = "/api/timeline/"
+    while url:
+        response = await client.get(url)
+        assert response.status_code == 200
+        pages.append(titles_on_page(store, response.text))
+        older = OLDER_LINK.search(response.text)
+        url = older and f"/api/timeline/?before={older[1]}"
+
+    expected = newest_first(authors={"parity_ann", "parity_eve"})
+    assert [title for page in pages for title in page] == expected
+    assert all(len(page) == 2 for page in pages[:-1])
+
+    newer = NEWER_LINK.search(response.text)
+    response = await client.get(f"/api/timeline/?after={newer[1]}")
+    assert titles_on_page(store, response.text) == pages[-2]
+
+
+async def walk_page(fetch, count: int) -> list[list[str]]:
+    pages = []
+    page = await fetch(limit=2)
+    while True:
+        pages.append([row.title for row in page.items])
+        if not page.older or sum(map(len, pages)) >= count:
+            break
+        page = await fetch(before=page.older, limit=2)
+
+    while page.newer:
+        page = await fetch(after=page.newer, limit=2)
+        pages.append([row.title for row in page.items])
+
+    return pages
+
+
+async def test_memory_backend_matches_sql(conn, monkeypatch):
+    monkeypatch.setattr(settings, "TIMELINE_FAN_OUT_MAX_FOLLOWERS", 2)
+    await ensure_partitions(conn, START, START)
+    db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+    sql = SQLAlchemyBlogRepository(db)
+    memory = InMemoryBlogRepository(MemoryStore())
+    memory_ids = fill_store(memory.store)
+
+    sql_ids = {}
+    for username, created_at in USERS:
+        sql_ids[username] = await conn.scalar(
+            insert(User)
+            .values(username=username, password="x", created_at=created_at)
+            .returning(User.id)
+        )
+    for index, (author, minute) in enumerate(POSTS):
+        post = post_values(sql_ids[author], index, minute)
+        await conn.scalar(create_post_query(post))
+
+    for follower, followee in FOLLOWS:
+        for repository, ids in ((sql, sql_ids), (memory, memory_ids)):
+            session_id = await session_store.create(ids[follower])
+            await repository.follow_user(ids[followee], session_id)
+
+    for name in ("fetch_feed", "fetch_user_posts", "fetch_timeline"):
+        for username in ("parity_ann", "parity_ben", "parity_dan"):
+            sql_fetch = getattr(sql, name)
+            memory_fetch = getattr(memory, name)
+            if name != "fetch_feed":
+                sql_fetch = partial(sql_fetch, sql_ids[username])
+                memory_fetch = partial(memory_fetch, memory_ids[username])
+            expected = await walk_page(memory_fetch, len(POSTS))
+            assert await walk_page(sql_fetch, len(POSTS)) == expected, (name, username)
+
+    result = await db.execute(
+        users_query().where(User.username.in_([name for name, _ in USERS]))
+    )
+    users, _ = await memory.fetch_users(limit=100)
+    assert [user.username for user in result] == [user.username for user in users]
+    await db.close()
@@ -0,0 +1,115 @@
+import re
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import insert, select, text
+
+import cli
+from app.db.models import Post, User
+from app.db.notifications import notify_query
+from app.db.partitions import ensure_partitions, list_partitions
+from app.repositories.pagination import keyset
+from app.repositories.repository import (
+    create_post_query,
+    locate_post,
+    new_post_values,
+    post_summaries_query,
+    user_posts_query,
+)
+from cli import detach_partition
+
+pytestmark = pytest.mark.anyio
+
+MONTH = date(2001, 1, 1)
+MONTHS = [date(2001, month, 1) for month in range(1, 5)]
+PARTITION_SCAN = re.compile(r" on (posts_\d{4}_\d{2}) .*\((never executed|actual)")
+ORDERED_APPEND = re.compile(r"^(\s*->\s+)?(Merge )?Append\b", re.MULTILINE)
+SORT = re.compile(r"^(\s*->\s+)?(Incremental )?Sort\b", re.MULTILINE)
+
+
+async def explain_analyze(conn, stmt) -> str:
+    sql = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    options = "ANALYZE, COSTS OFF, TIMING OFF, SUMMARY OFF"
+
+    return "\n".join(await conn.scalars(text(f"EXPLAIN ({options}) {sql}")))
+
+
+def executed_partitions(plan: str) -> dict[str, bool]:
+    return {
+        name: state == "actual" for name, state in PARTITION_SCAN.findall(plan)
+    }
+
+
+async def post_per_month(conn) -> tuple[int, list[int]]:
+    author_id = await conn.scalar(
+        insert(User)
+        .values(username="partition_pruning", password="x")
+        .returning(User.id)
+    )
+    await ensure_partitions(conn, MONTHS[0], MONTHS[-1])
+    post_ids = []
+    for month in MONTHS:
+        post = new_post_values(author_id, f"{month:%B}", "body")
+        post["created_at"] = datetime(month.year, month.month, 15)
+        post_ids.append(await conn.scalar(create_post_query(post)))
+
+    return author_id, post_ids
+
+
+async def test_post_lookup_executes_only_its_partition(conn):
+    _, post_ids = await post_per_month(conn)
+
+    plan = await explain_analyze(
+        conn, select(Post.title).where(locate_post(post_ids[1]))
+    )
+
+    executed = executed_partitions(plan)
+    assert len(executed) >= len(MONTHS), plan
+    assert [name for name, ran in executed.items() if ran] == ["posts_2001_02"], plan
+
+
+async def test_feed_and_profile_read_partitions_newest_first(conn):
+    author_id, _ = await post_per_month(conn)
+
+    for query in (post_summaries_query(), user_posts_query(author_id)):
+        plan = await explain_analyze(
+            conn, keyset(query, Post.created_at, Post.id, None, None, 2)
+        )
+
+        assert ORDERED_APPEND.search(plan), plan
+        assert not SORT.search(plan), plan
+        executed = executed_partitions(plan)
+        assert executed["posts_2001_02"], plan
+        assert not executed["posts_2001_01"], plan
+
+
+async def test_month_can_be_recreated_and_detached_again(conn, monkeypatch):
+    notified = []
+
+    def record_notify(topic, key=""):
+        notified.append(f"{topic}:{key}")
+        return notify_query(topic, key)
+
+    monkeypatch.setattr(cli, "notify_query", record_notify)
+    author_id = await conn.scalar(
+        insert(User)
+        .values(username="partition_author", password="x")
+        .returning(User.id)
+    )
+    archived = []
+    for _ in range(2):
+        assert await ensure_partitions(conn, MONTH, MONTH) == ["posts_2001_01"]
+        post = new_post_values(author_id, "old", "body")
+        post["created_at"] = datetime(2001, 1, 15)
+        await conn.scalar(create_post_query(post))
+
+        archived.append(await detach_partition(conn, "posts_2001_01", MONTH))
+
+        assert "posts_2001_01" not in dict(await list_partitions(conn))
+        assert sorted(notified) == ["page:feed", "page:post"]
+        notified.clear()
+
+    assert archived == ["posts_2001_01_archived", "posts_2001_01_archived_2"]
+    for name in archived:
+        assert await conn.scalar(text(f"SELECT count(*) FROM {name}")) == 1
+    assert await ensure_partitions(conn, MONTH, MONTH) == ["posts_2001_01"]
@@ -0,0 +1,55 @@
+import re
+
+import pytest
+from sqlalchemy import select, text
+
+from app.core.config import settings
+from app.db.models import Post, User
+from app.repositories.pagination import keyset
+from app.repositories.repository import post_summaries_query, user_posts_query
+
+pytestmark = pytest.mark.anyio
+
+INDEX_SCAN = re.compile(r"Index (Only )?Scan")
+
+
+async def explain(conn, stmt) -> str:
+    # Test tables are tiny, so the planner would rather read them sequentially;
+    # with seq scans disabled the plan shows whether an index fits the query.
+    await conn.execute(text("SET LOCAL enable_seqscan = off"))
+    sql = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    plan = "\n".join(await conn.scalars(text(f"EXPLAIN {sql}")))
+    assert INDEX_SCAN.search(plan), plan
+    assert "Seq Scan" not in plan, plan
+
+    return plan
+
+
+async def test_feed_uses_created_at_index(conn):
+    plan = await explain(
+        conn,
+        keyset(
+            post_summaries_query(),
+            Post.created_at,
+            Post.id,
+            None,
+            None,
+            settings.FEED_PAGE_SIZE,
+        ),
+    )
+    assert "created_at_id_idx" in plan, plan
+
+
+async def test_profile_uses_author_index(conn):
+    plan = await explain(
+        conn,
+        user_posts_query(1).order_by(Post.created_at.desc(), Post.id.desc()),
+    )
+    assert "author_id_created_at" in plan, plan
+
+
+async def test_username_lookup_uses_unique_index(conn):
+    plan = await explain(
+        conn, select(User.id, User.password).where(User.username == "someone")
+    )
+    assert "ix_users_username" in plan, plan
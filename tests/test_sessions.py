@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.core.config import settings
+from app.core.sessions import DatabaseSessionStore
+from app.db.db import async_engine
+from app.db.models import User
+from app.db.notifications import listen_for_invalidations
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_logout_evicts_session_cached_by_other_workers(migrated_database):
+    first = DatabaseSessionStore(ttl=60, cache_ttl=60, cache_max_entries=10)
+    second = DatabaseSessionStore(ttl=60, cache_ttl=60, cache_max_entries=10)
+    listening, forgotten = asyncio.Event(), asyncio.Event()
+
+    def forget(session_id):
+        second.forget(session_id)
+        (listening if session_id is None else forgotten).set()
+
+    async with async_engine.begin() as conn:
+        user_id = await conn.scalar(
+            insert(User)
+            .values(username="session_user", password="x")
+            .returning(User.id)
+        )
+    listener = asyncio.create_task(
+        listen_for_invalidations(settings.db_url_asyncpg, {"session": forget})
+    )
+    try:
+        await asyncio.wait_for(listening.wait(), 5)
+        assert async_engine.pool.checkedout() == 0
+        session_id = await first.create(user_id)
+        assert await second.get(session_id) == user_id
+
+        await first.delete(session_id)
+        await asyncio.wait_for(forgotten.wait(), 5)
+
+        assert await second.get(session_id) is None
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(User).where(User.id == user_id))
+        await async_engine.dispose()
@@ -0,0 +1,33 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import password_hasher
+from app.db.models import User
+from app.repositories.repository import SQLAlchemyBlogRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_duplicate_signup_skips_password_hashing(conn, monkeypatch):
+    hashed = []
+
+    async def fake_hash(password):
+        hashed.append(password)
+        return "hash"
+
+    monkeypatch.setattr(password_hasher, "hash", fake_hash)
+    await conn.execute(insert(User).values(username="signup_taken", password="x"))
+    db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+    repository = SQLAlchemyBlogRepository(db)
+
+    with pytest.raises(HTTPException) as error:
+        await repository.register_user("signup_taken", "secret")
+    assert error.value.status_code == 400
+    assert hashed == []
+
+    response = await repository.register_user("signup_new", "secret")
+    assert response.status_code == 303
+    assert hashed == ["secret"]
+    await db.close()
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from app.core.static import IMMUTABLE, STATIC_DIRECTORY, CachedStaticFiles, file_digest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STYLESHEET = "css/blog.css"
+
+
+@pytest.fixture(autouse=True)
+def project_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+
+def cache_control(query_string: bytes) -> str:
+    files = CachedStaticFiles(directory=STATIC_DIRECTORY)
+    full_path, stat_result = files.lookup_path(STYLESHEET)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [],
+        "query_string": query_string,
+    }
+
+    return files.file_response(full_path, stat_result, scope).headers["Cache-Control"]
+
+
+def test_current_version_is_immutable():
+    assert cache_control(f"v={file_digest(STYLESHEET)}".encode()) == IMMUTABLE
+
+
+@pytest.mark.parametrize("query_string", [b"", b"v=0123456789ab", b"nov=1", b"v="])
+def test_other_queries_are_revalidated(query_string):
+    assert cache_control(query_string) == "public, no-cache"
@@ -0,0 +1,52 @@
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.templating import stream_template
+
+pytestmark = pytest.mark.anyio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def project_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+
+class Users:
+    has_more = False
+
+    def __init__(self, count: int):
+        self.count = count
+        self.fetched = 0
+
+    async def __aiter__(self):
+        for index in range(self.count):
+            self.fetched += 1
+            yield SimpleNamespace(
+                id=index,
+                username=f"user{index}",
+                role="user",
+                created_at=datetime(2024, 1, 1),
+                post_count=self.count - index,
+                recent_post_at=None,
+            )
+
+
+async def test_head_and_first_rows_are_sent_before_the_rest():
+    users = Users(20)
+    chunks = stream_template(
+        "users_all.html", {"request": None, "users": users, "page": 1}
+    )
+
+    first = await anext(chunks)
+    assert "</head>" in first
+    assert "user0" in first
+    assert users.fetched < users.count
+
+    rest = [chunk async for chunk in chunks]
+    assert rest
+    assert "user19" in "".join(rest)
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.sessions import session_store
+from app.db.models import Follow, Post, TimelineEntry, User
+from app.repositories.outbox import OutboxWorker, fan_out_post
+from app.repositories.repository import (
+    SQLAlchemyBlogRepository,
+    create_post_query,
+    new_post_values,
+)
+from app.repositories.timeline import backfill_query
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_user(conn, username: str) -> int:
+    return await conn.scalar(
+        insert(User).values(username=username, password="x").returning(User.id)
+    )
+
+
+async def test_backfill_and_fan_out_do_not_duplicate_entries(conn):
+    author_id = await add_user(conn, "timeline_author")
+    reader_id = await add_user(conn, "timeline_reader")
+    post_ids = [
+        await conn.scalar(
+            create_post_query(new_post_values(author_id, f"post {i}", "body"))
+        )
+        for i in range(3)
+    ]
+
+    await conn.execute(
+        insert(Follow).values(follower_id=reader_id, followee_id=author_id)
+    )
+    await conn.execute(backfill_query(reader_id, author_id))
+    for post_id in post_ids:
+        created_at = await conn.scalar(
+            select(Post.created_at).where(Post.id == post_id)
+        )
+        await fan_out_post(
+            conn, {"post_id": post_id, "created_at": created_at.isoformat()}
+        )
+    await conn.execute(backfill_query(reader_id, author_id))
+
+    entries = await conn.scalar(
+        select(func.count()).where(TimelineEntry.user_id == reader_id)
+    )
+    assert entries == len(post_ids)
+
+
+async def test_posts_published_above_threshold_reach_timelines_below_it(
+    conn, monkeypatch
+):
+    monkeypatch.setattr(settings, "TIMELINE_FAN_OUT_MAX_FOLLOWERS", 2)
+
+    def session():
+        return AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+
+    worker = OutboxWorker(session, 100, 1.0, 3, 1.0, 1.0)
+    db = session()
+    repository = SQLAlchemyBlogRepository(db)
+    author_id = await add_user(conn, "threshold_author")
+    readers = [await add_user(conn, f"threshold_reader{i}") for i in range(2)]
+    sessions = [await session_store.create(reader) for reader in readers]
+
+    for session_id in sessions:
+        await repository.follow_user(author_id, session_id)
+    post_id = await db.scalar(
+        create_post_query(new_post_values(author_id, "fanned in", "body"))
+    )
+    await worker.drain()
+
+    page = await repository.fetch_timeline(readers[0])
+    assert [post.id for post in page.items] == [post_id]
+
+    await repository.unfollow_user(author_id, sessions[1])
+    await worker.drain()
+
+    entries = await conn.scalars(
+        select(TimelineEntry.post_id).where(TimelineEntry.user_id == readers[0])
+    )
+    assert entries.all() == [post_id]
+    page = await repository.fetch_timeline(readers[0])
+    assert [post.id for post in page.items] == [post_id]
+    await db.close()